@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks dos caminhos quentes da simulação e da evolução.
+
+Uso:
+    python benchmark_robo.py --saida bench.json
+    python benchmark_robo.py --saida bench.json --base baseline.json --limiar 0.1
+
+Todas as medições usam sementes fixas. Cada medição é repetida e vale a
+melhor repetição; o resultado é uma taxa (operações por segundo, ou
+gerações por minuto), de modo que valores maiores são sempre melhores.
+Com --base, cada taxa é comparada à do baseline e o processo termina com
+código 1 se alguma cair mais que --limiar (fração).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+import robo_exercicio as robo
+
+ARQUIVO_MELHOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'melhor_robo.json')
+
+
+def _cronometrar(funcao, repeticoes):
+    # Melhor tempo entre as repetições; funcao devolve o número de operações
+    melhor = float('inf')
+    operacoes = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        operacoes = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return operacoes, melhor
+
+
+def _resultado(operacoes, segundos, unidade, por_minuto=False):
+    taxa = operacoes / segundos if segundos > 0 else float('inf')
+    if por_minuto:
+        taxa *= 60
+    return {'operacoes': operacoes, 'segundos': segundos, 'taxa': taxa, 'unidade': unidade}
+
+
+def _ambiente(semente):
+    random.seed(semente)
+    ambiente = robo.Ambiente()
+    x, y = ambiente.posicao_segura()
+    return ambiente, robo.Robo(x, y)
+
+
+def _sensores_amostrados(n, semente):
+    # Vetores de sensores colhidos de um episódio real do melhor_robo.json
+    ambiente, r = _ambiente(semente)
+    individuo = robo.IndividuoPG.carregar(ARQUIVO_MELHOR)
+    amostras = []
+    while len(amostras) < n:
+        sensores = r.get_sensores(ambiente)
+        amostras.append(sensores)
+        aceleracao, rotacao = individuo.avaliar_par(sensores)
+        sem_energia = r.mover(max(-1, min(1, aceleracao)), max(-0.5, min(0.5, rotacao)), ambiente)
+        if sem_energia or ambiente.passo():
+            ambiente.reset()
+            r.reset(*ambiente.posicao_segura())
+    return amostras
+
+
+def bench_robo_mover(n, repeticoes):
+    def executar():
+        ambiente, r = _ambiente(1)
+        random.seed(2)
+        inicio = (r.x, r.y)
+        for passo in range(n):
+            if passo % 200 == 0:
+                r.reset(*inicio)
+            r.mover(0.5, 0.1, ambiente)
+        return n
+    return _resultado(*_cronometrar(executar, repeticoes), 'passos/s')
+
+
+def bench_robo_get_sensores(n, repeticoes):
+    ambiente, r = _ambiente(1)
+    rng = random.Random(3)
+    posicoes = [(rng.uniform(20, 780), rng.uniform(20, 580), rng.uniform(-np.pi, np.pi))
+                for _ in range(256)]
+
+    def executar():
+        for i in range(n):
+            r.x, r.y, r.angulo = posicoes[i % len(posicoes)]
+            r.get_sensores(ambiente)
+        return n
+    return _resultado(*_cronometrar(executar, repeticoes), 'chamadas/s')
+
+
+def bench_verificar_colisao(n, repeticoes):
+    ambiente, _ = _ambiente(1)
+    rng = random.Random(4)
+    pontos = [(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(256)]
+
+    def executar():
+        for i in range(n):
+            x, y = pontos[i % len(pontos)]
+            ambiente.verificar_colisao(x, y, 15)
+        return n
+    return _resultado(*_cronometrar(executar, repeticoes), 'chamadas/s')
+
+
+def _bench_arvores(individuos, amostras, repeticoes, compilado):
+    if compilado:
+        def executar():
+            for individuo in individuos:
+                for sensores in amostras:
+                    individuo.avaliar(sensores, 'aceleracao')
+                    individuo.avaliar(sensores, 'rotacao')
+            return 2 * len(individuos) * len(amostras)
+    else:
+        # arvore_aceleracao/arvore_rotacao remontam o dicionário a cada acesso;
+        # ficam fora da medição, que cobre só avaliar_no
+        arvores = [(individuo, individuo.arvore_aceleracao, individuo.arvore_rotacao)
+                   for individuo in individuos]
+
+        def executar():
+            for individuo, aceleracao, rotacao in arvores:
+                for sensores in amostras:
+                    individuo.avaliar_no(aceleracao, sensores)
+                    individuo.avaliar_no(rotacao, sensores)
+            return 2 * len(individuos) * len(amostras)
+    return _resultado(*_cronometrar(executar, repeticoes), 'árvores/s')
+
+
+def _individuos_aleatorios(quantidade, semente):
+    random.seed(semente)
+    return [robo.IndividuoPG(5) for _ in range(quantidade)]
+
+
+def bench_avaliar_individuo(n, repeticoes):
+    individuo = robo.IndividuoPG.carregar(ARQUIVO_MELHOR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pg = robo.ProgramacaoGenetica(tamanho_populacao=1, num_ilhas=1)
+
+    def executar():
+        random.seed(5)
+        for _ in range(n):
+            pg.avaliar_individuo(individuo)
+        return n
+    return _resultado(*_cronometrar(executar, repeticoes), 'avaliações/s')
+
+
+def bench_crossover_mutacao(n, repeticoes):
+    def executar():
+        populacao = _individuos_aleatorios(40, 6)
+        for i in range(n):
+            pai1, pai2 = random.sample(populacao, 2)
+            filho = pai1.crossover(pai2)
+            filho.mutacao(0.3)
+            populacao[i % len(populacao)] = filho
+        return n
+    return _resultado(*_cronometrar(executar, repeticoes), 'filhos/s')
+
+
+def bench_geracao_evoluir(tamanho_populacao, repeticoes):
+    def executar():
+        random.seed(7)
+        with contextlib.redirect_stdout(io.StringIO()):
+            pg = robo.ProgramacaoGenetica(tamanho_populacao=tamanho_populacao, num_ilhas=2,
+                                          elitismo=0.1, prob_mutacao=0.3)
+            pg.evoluir(n_geracoes=1)
+        return 1
+    return _resultado(*_cronometrar(executar, repeticoes), 'gerações/min', por_minuto=True)
+
+
+def executar_benchmarks(escala=1.0, repeticoes=3):
+    """Executa todos os benchmarks e devolve {nome: resultado}"""
+    def n(base):
+        return max(1, int(base * escala))
+
+    amostras = _sensores_amostrados(n(200), 8)
+    melhor = [robo.IndividuoPG.carregar(ARQUIVO_MELHOR)]
+    aleatorios = _individuos_aleatorios(20, 9)
+
+    etapas = [
+        ('robo_mover', lambda: bench_robo_mover(n(20000), repeticoes)),
+        ('robo_get_sensores', lambda: bench_robo_get_sensores(n(20000), repeticoes)),
+        ('ambiente_verificar_colisao', lambda: bench_verificar_colisao(n(50000), repeticoes)),
+        ('avaliar_no_melhor_robo', lambda: _bench_arvores(melhor, amostras, repeticoes, False)),
+        ('avaliar_no_aleatorias', lambda: _bench_arvores(aleatorios, amostras[:n(50)],
+                                                         repeticoes, False)),
+        ('avaliar_compilado_melhor_robo', lambda: _bench_arvores(melhor, amostras,
+                                                                 repeticoes, True)),
+        ('avaliar_compilado_aleatorias', lambda: _bench_arvores(aleatorios, amostras[:n(50)],
+                                                                repeticoes, True)),
+        ('avaliar_individuo', lambda: bench_avaliar_individuo(n(5), repeticoes)),
+        ('crossover_mutacao', lambda: bench_crossover_mutacao(n(2000), repeticoes)),
+        ('geracao_evoluir', lambda: bench_geracao_evoluir(max(3, n(20)), repeticoes)),
+    ]
+    resultados = {}
+    for nome, etapa in etapas:
+        resultados[nome] = etapa()
+        print(f"  {nome:32s} {resultados[nome]['taxa']:>14,.1f} {resultados[nome]['unidade']}")
+    return resultados
+
+
+def comparar(resultados, base, limiar=0.1):
+    """Compara taxas com o baseline; devolve a lista de (nome, razão) que regrediram"""
+    regressoes = []
+    for nome, resultado in resultados.items():
+        if nome not in base:
+            continue
+        razao = resultado['taxa'] / base[nome]['taxa']
+        marca = ''
+        if razao < 1 - limiar:
+            regressoes.append((nome, razao))
+            marca = '  <-- regressão'
+        print(f"  {nome:32s} {razao:6.2f}x{marca}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--saida', help='arquivo JSON onde gravar os resultados')
+    parser.add_argument('--base', help='arquivo JSON de baseline para comparação')
+    parser.add_argument('--limiar', type=float, default=0.1,
+                        help='queda relativa de taxa considerada regressão (padrão: 0.1)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--escala', type=float, default=1.0,
+                        help='multiplica o número de operações de cada benchmark')
+    args = parser.parse_args(argv)
+
+    print("Executando benchmarks...")
+    resultados = executar_benchmarks(args.escala, args.repeticoes)
+    relatorio = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'escala': args.escala,
+        'repeticoes': args.repeticoes,
+        'resultados': resultados,
+    }
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(relatorio, f, indent=2)
+
+    if args.base:
+        with open(args.base) as f:
+            base = json.load(f)['resultados']
+        print(f"\nComparação com {args.base} (limiar {args.limiar:.0%}):")
+        regressoes = comparar(resultados, base, args.limiar)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) encontrada(s)")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
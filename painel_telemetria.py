@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Acompanha a telemetria de uma evolução e redesenha o gráfico de fitness.
+
+Uso:
+    python painel_telemetria.py telemetria.jsonl
+    python painel_telemetria.py telemetria.jsonl --saida evolucao_fitness_robo.png --intervalo 30
+    python painel_telemetria.py telemetria.jsonl --uma-vez
+
+O arquivo é o JSONL gravado por evoluir(telemetria=...). A cada ciclo só as
+linhas novas são lidas (o deslocamento no arquivo é guardado) e as curvas do
+gráfico são estendidas; a imagem é gravada num temporário e trocada com
+os.replace, então quem a abre nunca vê um PNG pela metade. As séries ficam
+limitadas a --max-pontos: ao passar do limite, metade dos pontos é
+descartada e só uma a cada duas gerações seguintes é guardada.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+class LeitorTelemetria:
+    """Lê incrementalmente os registros completos anexados a um arquivo JSONL"""
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.posicao = 0
+        self._resto = b''  # Linha ainda incompleta (sendo escrita)
+
+    def ler_novos(self):
+        if not os.path.exists(self.arquivo):
+            return []
+        if os.path.getsize(self.arquivo) < self.posicao:
+            # Arquivo truncado ou recriado: recomeça do início
+            self.posicao = 0
+            self._resto = b''
+        with open(self.arquivo, 'rb') as f:
+            f.seek(self.posicao)
+            dados = f.read()
+            self.posicao = f.tell()
+        linhas = (self._resto + dados).split(b'\n')
+        self._resto = linhas.pop()
+        return [json.loads(linha) for linha in linhas if linha.strip()]
+
+
+class PainelFitness:
+    """Curvas de fitness e tamanho dos genomas, atualizadas a cada lote de registros"""
+
+    SERIES = ('melhor', 'p90', 'mediana', 'tamanho_medio')
+
+    def __init__(self, saida='evolucao_fitness_robo.png', max_pontos=5000):
+        self.saida = saida
+        self.max_pontos = max_pontos
+        self.passo = 1  # Guarda uma a cada passo gerações
+        self.geracoes = []
+        self.series = {nome: [] for nome in self.SERIES}
+
+        self.figura = Figure(figsize=(10, 7))
+        FigureCanvasAgg(self.figura)
+        ax_fitness, ax_tamanho = self.figura.subplots(2, 1, sharex=True,
+                                                      gridspec_kw={'height_ratios': (3, 1)})
+        self.linhas = {
+            'melhor': ax_fitness.plot([], [], label='Melhor')[0],
+            'p90': ax_fitness.plot([], [], label='Percentil 90', alpha=0.7)[0],
+            'mediana': ax_fitness.plot([], [], label='Mediana', alpha=0.7)[0],
+            'tamanho_medio': ax_tamanho.plot([], [], color='tab:gray')[0],
+        }
+        ax_fitness.set_title('Evolução do Fitness')
+        ax_fitness.set_ylabel('Fitness')
+        ax_fitness.legend(loc='upper left')
+        ax_tamanho.set_xlabel('Geração')
+        ax_tamanho.set_ylabel('Nós (média)')
+        self.eixos = (ax_fitness, ax_tamanho)
+
+    def adicionar(self, registros):
+        for registro in registros:
+            if registro['geracao'] % self.passo:
+                continue
+            quantis = registro.get('quantis_fitness', {})
+            self.geracoes.append(registro['geracao'])
+            self.series['melhor'].append(registro['melhor_fitness'])
+            self.series['p90'].append(quantis.get('p90'))
+            self.series['mediana'].append(quantis.get('p50'))
+            self.series['tamanho_medio'].append(registro.get('tamanho_genomas', {}).get('media'))
+            if len(self.geracoes) > self.max_pontos:
+                self.passo *= 2
+                manter = [i for i, g in enumerate(self.geracoes) if g % self.passo == 0]
+                self.geracoes = [self.geracoes[i] for i in manter]
+                self.series = {nome: [valores[i] for i in manter]
+                               for nome, valores in self.series.items()}
+
+    def desenhar(self):
+        for nome, linha in self.linhas.items():
+            linha.set_data(self.geracoes, [float('nan') if v is None else v
+                                           for v in self.series[nome]])
+        for ax in self.eixos:
+            ax.relim()
+            ax.autoscale_view()
+        raiz, extensao = os.path.splitext(self.saida)
+        temporario = f"{raiz}.tmp{extensao}"
+        self.figura.savefig(temporario)
+        os.replace(temporario, self.saida)
+
+
+def acompanhar(arquivo, saida='evolucao_fitness_robo.png', intervalo=10.0, ciclos=None,
+               max_pontos=5000):
+    """Redesenha saida sempre que chegam registros novos; ciclos=None segue até Ctrl+C"""
+    leitor = LeitorTelemetria(arquivo)
+    painel = PainelFitness(saida, max_pontos)
+    ciclo = 0
+    while ciclos is None or ciclo < ciclos:
+        if ciclo:
+            time.sleep(intervalo)
+        novos = leitor.ler_novos()
+        if novos:
+            painel.adicionar(novos)
+            painel.desenhar()
+            ultimo = novos[-1]
+            print(f"Geração {ultimo['geracao']}: melhor fitness {ultimo['melhor_fitness']:.2f}")
+        ciclo += 1
+    return painel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('telemetria', help='arquivo JSONL gravado por evoluir(telemetria=...)')
+    parser.add_argument('--saida', default='evolucao_fitness_robo.png')
+    parser.add_argument('--intervalo', type=float, default=10.0,
+                        help='segundos entre leituras do arquivo (padrão: 10)')
+    parser.add_argument('--max-pontos', type=int, default=5000)
+    parser.add_argument('--uma-vez', action='store_true',
+                        help='lê o que já existe, desenha e termina')
+    args = parser.parse_args(argv)
+
+    try:
+        acompanhar(args.telemetria, args.saida, args.intervalo, 1 if args.uma_vez else None,
+                   args.max_pontos)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,63 @@
 # -*- coding: utf-8 -*-
 import numpy as np
 import random
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import matplotlib.animation as animation
+import argparse
+import importlib
+import sys
 import json
+import os
+import pickle
+import struct
 import time
+import tracemalloc
 import math
+import contextlib
+import array
+import collections
+import hashlib
+import concurrent.futures
+import multiprocessing
+from multiprocessing import shared_memory
+import queue
+import traceback
+
+try:
+    import numba  # Opcional: compila os kernels de física de Robo.mover
+except ImportError:
+    numba = None
+
+
+def tem_display():
+    # Em Linux sem X11/Wayland (servidores, CI) não há onde abrir janelas
+    if not sys.platform.startswith('linux'):
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+class _ModuloTardio:
+    """Importa o módulo no primeiro acesso a um atributo.
+
+    Assim a evolução (e os workers, que importam este arquivo) não carregam o
+    matplotlib; só quem desenha paga a importação. Sem display e sem
+    MPLBACKEND, o backend Agg é escolhido antes do pyplot ser importado.
+    """
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            if 'matplotlib.pyplot' not in sys.modules and 'MPLBACKEND' not in os.environ:
+                if not tem_display():
+                    importlib.import_module('matplotlib').use('Agg')
+            self._modulo = importlib.import_module(self._nome)
+        return getattr(self._modulo, atributo)
+
+
+plt = _ModuloTardio('matplotlib.pyplot')
+patches = _ModuloTardio('matplotlib.patches')
+animation = _ModuloTardio('matplotlib.animation')
 
 # =====================================================================
 # PARTE 1: ESTRUTURA DA SIMULAÇÃO (NÃO MODIFICAR)
@@ -25,6 +76,51 @@ class Ambiente:
         self.max_tempo = 1000  # Tempo máximo de simulação
         self.meta = self.gerar_meta()  # Adicionando a meta
         self.meta_atingida = False  # Flag para controlar se a meta foi atingida
+        self.grade = None  # GradeObstaculos opcional (ver construir_grade)
+        self.indice_recursos = None  # IndiceRecursos opcional (ver construir_indice_recursos)
+
+    def cena(self):
+        # Parte estática do ambiente como arrays (ver de_cena)
+        return {
+            'largura': np.float64(self.largura),
+            'altura': np.float64(self.altura),
+            'max_tempo': np.int64(self.max_tempo),
+            'obstaculos': np.array([[o['x'], o['y'], o['largura'], o['altura']]
+                                    for o in self.obstaculos], dtype=float).reshape(-1, 4),
+            'recursos': np.array([[r['x'], r['y']] for r in self.recursos],
+                                 dtype=float).reshape(-1, 2),
+            'meta': np.array([self.meta['x'], self.meta['y'], self.meta['raio']], dtype=float),
+        }
+
+    @classmethod
+    def de_cena(cls, cena):
+        # Reconstrói o ambiente (recursos não coletados, tempo zero) sem consumir o random
+        ambiente = cls.__new__(cls)
+        ambiente.largura = int(cena['largura'])
+        ambiente.altura = int(cena['altura'])
+        ambiente.obstaculos = [
+            {'x': x, 'y': y, 'largura': largura, 'altura': altura}
+            for x, y, largura, altura in np.asarray(cena['obstaculos']).tolist()]
+        ambiente.recursos = [{'x': x, 'y': y, 'coletado': False}
+                             for x, y in np.asarray(cena['recursos']).tolist()]
+        x, y, raio = np.asarray(cena['meta']).tolist()
+        ambiente.meta = {'x': x, 'y': y, 'raio': raio}
+        ambiente.tempo = 0
+        ambiente.max_tempo = int(cena['max_tempo'])
+        ambiente.meta_atingida = False
+        ambiente.grade = None
+        ambiente.indice_recursos = None
+        return ambiente
+
+    def construir_grade(self, tamanho_celula=20, raio=15):
+        # Pré-calcula a grade de obstáculos; deve ser refeita se os obstáculos mudarem
+        self.grade = GradeObstaculos(self, tamanho_celula, raio)
+        return self.grade
+
+    def construir_indice_recursos(self, tamanho_celula=None):
+        # Indexa os recursos atuais; deve ser refeito se a lista de recursos mudar
+        self.indice_recursos = IndiceRecursos(self, tamanho_celula)
+        return self.indice_recursos
 
     def gerar_obstaculos(self, num_obstaculos):
         obstaculos = []
@@ -95,7 +191,15 @@ class Ambiente:
         if x - raio < 0 or x + raio > self.largura or y - raio < 0 or y + raio > self.altura:
             return True
 
-        # Verificar colisão com obstáculos
+        # Verificar colisão com obstáculos (consulta O(1) quando há grade)
+        if self.grade is not None:
+            colide = self.grade.colide_obstaculo(x, y, raio)
+            if colide is not None:
+                return colide
+        return self.colide_obstaculo_exato(x, y, raio)
+
+    def colide_obstaculo_exato(self, x, y, raio):
+        # Geometria exata, percorrendo todos os obstáculos
         for obstaculo in self.obstaculos:
             if (x + raio > obstaculo['x'] and
                 x - raio < obstaculo['x'] + obstaculo['largura'] and
@@ -105,7 +209,20 @@ class Ambiente:
 
         return False
 
+    def dist_obstaculo_exata(self, x, y):
+        # Distância ao centro do obstáculo mais próximo, percorrendo todos os obstáculos
+        dist_obstaculo = float('inf')
+        for obstaculo in self.obstaculos:
+            # Simplificação: considerar apenas a distância até o centro do obstáculo
+            centro_x = obstaculo['x'] + obstaculo['largura'] / 2
+            centro_y = obstaculo['y'] + obstaculo['altura'] / 2
+            dist = np.sqrt((x - centro_x)**2 + (y - centro_y)**2)
+            dist_obstaculo = min(dist_obstaculo, dist)
+        return dist_obstaculo
+
     def verificar_coleta_recursos(self, x, y, raio):
+        if self.indice_recursos is not None:
+            return self.indice_recursos.coletar(x, y, raio + 10)
         recursos_coletados = 0
         for recurso in self.recursos:
             if not recurso['coletado']:
@@ -129,10 +246,20 @@ class Ambiente:
         self.tempo = 0
         for recurso in self.recursos:
             recurso['coletado'] = False
+        if self.indice_recursos is not None:
+            self.indice_recursos.sincronizar()
         self.meta_atingida = False
         return self.get_estado()
 
     def get_estado(self):
+        if self.indice_recursos is not None:
+            restantes = self.indice_recursos.pendentes
+            return {
+                'tempo': self.tempo,
+                'recursos_coletados': len(self.recursos) - restantes,
+                'recursos_restantes': restantes,
+                'meta_atingida': self.meta_atingida
+            }
         return {
             'tempo': self.tempo,
             'recursos_coletados': sum(1 for r in self.recursos if r['coletado']),
@@ -174,6 +301,362 @@ class Ambiente:
         return self.largura // 2, self.altura // 2
 
 
+class GradeObstaculos:
+    """Grade pré-calculada sobre os obstáculos de um Ambiente.
+
+    Cada célula é classificada como livre, ocupada ou de fronteira para um robô
+    de raio fixo; só as células de fronteira fazem o teste exato, e apenas contra
+    os obstáculos que as tocam. Para dist_obstaculo cada célula guarda os
+    centros que podem ser o mais próximo de algum ponto dela, então o mínimo
+    sobre esses candidatos é idêntico ao mínimo sobre todos os obstáculos.
+    """
+
+    LIVRE, OCUPADA, FRONTEIRA = 0, 1, 2
+
+    def __init__(self, ambiente, tamanho_celula=20, raio=15):
+        self.tamanho_celula = tamanho_celula
+        self.raio = raio
+        self.colunas = max(1, math.ceil(ambiente.largura / tamanho_celula))
+        self.linhas = max(1, math.ceil(ambiente.altura / tamanho_celula))
+        folga = 1e-6  # Margem para erros de arredondamento nas comparações estritas
+
+        ax = np.arange(self.colunas) * tamanho_celula
+        bx = ax + tamanho_celula
+        ay = np.arange(self.linhas) * tamanho_celula
+        by = ay + tamanho_celula
+
+        retangulos = [(o['x'], o['x'] + o['largura'], o['y'], o['y'] + o['altura'])
+                      for o in ambiente.obstaculos]
+        centros = [(o['x'] + o['largura'] / 2, o['y'] + o['altura'] / 2)
+                   for o in ambiente.obstaculos]
+
+        self.ocupacao = [[self.LIVRE] * self.colunas for _ in range(self.linhas)]
+        self.retangulos = [[()] * self.colunas for _ in range(self.linhas)]
+        self.centros = [[()] * self.colunas for _ in range(self.linhas)]
+        if not retangulos:
+            return
+
+        r = np.array(retangulos, dtype=float)
+        # Retângulos expandidos pelo raio: colisão <=> ponto no interior de algum deles
+        x0, x1 = r[:, 0] - raio, r[:, 1] + raio
+        y0, y1 = r[:, 2] - raio, r[:, 3] + raio
+        toca_x = (bx[None, :] >= x0[:, None] - folga) & (ax[None, :] <= x1[:, None] + folga)
+        toca_y = (by[None, :] >= y0[:, None] - folga) & (ay[None, :] <= y1[:, None] + folga)
+        contem_x = (ax[None, :] > x0[:, None] + folga) & (bx[None, :] < x1[:, None] - folga)
+        contem_y = (ay[None, :] > y0[:, None] + folga) & (by[None, :] < y1[:, None] - folga)
+        toca = toca_y[:, :, None] & toca_x[:, None, :]  # (obstáculo, linha, coluna)
+        contem = (contem_y[:, :, None] & contem_x[:, None, :]).any(axis=0)
+
+        c = np.array(centros, dtype=float)
+        dx_min = np.maximum(np.maximum(ax[None, :] - c[:, 0:1], 0), c[:, 0:1] - bx[None, :])
+        dy_min = np.maximum(np.maximum(ay[None, :] - c[:, 1:2], 0), c[:, 1:2] - by[None, :])
+        dx_max = np.maximum(np.abs(c[:, 0:1] - ax[None, :]), np.abs(c[:, 0:1] - bx[None, :]))
+        dy_max = np.maximum(np.abs(c[:, 1:2] - ay[None, :]), np.abs(c[:, 1:2] - by[None, :]))
+        dist_min = np.sqrt(dy_min[:, :, None]**2 + dx_min[:, None, :]**2)
+        dist_max = np.sqrt(dy_max[:, :, None]**2 + dx_max[:, None, :]**2)
+        candidato = dist_min <= dist_max.min(axis=0)[None, :, :] + folga
+
+        for i in range(self.linhas):
+            for j in range(self.colunas):
+                self.centros[i][j] = tuple(centros[k] for k in np.flatnonzero(candidato[:, i, j]))
+                if contem[i, j]:
+                    self.ocupacao[i][j] = self.OCUPADA
+                elif toca[:, i, j].any():
+                    self.ocupacao[i][j] = self.FRONTEIRA
+                    self.retangulos[i][j] = tuple(
+                        retangulos[k] for k in np.flatnonzero(toca[:, i, j]))
+
+    def _celula(self, x, y):
+        i = int(y // self.tamanho_celula)
+        j = int(x // self.tamanho_celula)
+        if 0 <= i < self.linhas and 0 <= j < self.colunas:
+            return i, j
+        return None
+
+    def colide_obstaculo(self, x, y, raio):
+        """Colisão com obstáculos (sem as bordas); None quando a grade não se aplica"""
+        celula = self._celula(x, y)
+        if celula is None or raio != self.raio:
+            return None
+        i, j = celula
+        estado = self.ocupacao[i][j]
+        if estado == self.LIVRE:
+            return False
+        if estado == self.OCUPADA:
+            return True
+        for ox, ox2, oy, oy2 in self.retangulos[i][j]:
+            if x + raio > ox and x - raio < ox2 and y + raio > oy and y - raio < oy2:
+                return True
+        return False
+
+    def dist_obstaculo(self, x, y):
+        """Distância ao centro do obstáculo mais próximo; None fora da grade"""
+        celula = self._celula(x, y)
+        if celula is None:
+            return None
+        dist_obstaculo = float('inf')
+        for centro_x, centro_y in self.centros[celula[0]][celula[1]]:
+            dist = np.sqrt((x - centro_x)**2 + (y - centro_y)**2)
+            dist_obstaculo = min(dist_obstaculo, dist)
+        return dist_obstaculo
+
+    def validar(self, ambiente, amostras=10000, semente=0):
+        # Compara a grade com a geometria exata em pontos aleatórios; devolve as divergências
+        rng = random.Random(semente)
+        divergencias = []
+        for _ in range(amostras):
+            x = rng.uniform(0, ambiente.largura)
+            y = rng.uniform(0, ambiente.altura)
+            colide = self.colide_obstaculo(x, y, self.raio)
+            if colide is not None and colide != ambiente.colide_obstaculo_exato(x, y, self.raio):
+                divergencias.append(('colisao', x, y))
+            dist = self.dist_obstaculo(x, y)
+            if dist is not None and dist != ambiente.dist_obstaculo_exata(x, y):
+                divergencias.append(('dist_obstaculo', x, y))
+        return divergencias
+
+
+class IndiceRecursos:
+    """Grade de baldes sobre os recursos de um Ambiente.
+
+    Cada célula guarda os índices dos recursos ainda não coletados. A coleta
+    tira o recurso do seu balde em O(1), trocando-o com o último. A consulta
+    do mais próximo percorre anéis de células a partir da do robô e para
+    quando o próximo anel não pode ter nada mais perto; como usa a mesma
+    fórmula da varredura completa, a distância é idêntica. A coleta só
+    examina as células que tocam o círculo de alcance. Os recursos devem ser
+    marcados e desmarcados pelo Ambiente (verificar_coleta_recursos, reset),
+    que mantém o índice em dia.
+    """
+
+    def __init__(self, ambiente, tamanho_celula=None):
+        self.recursos = ambiente.recursos
+        if tamanho_celula is None:
+            # Cerca de um recurso por célula, sem células menores que o alcance de coleta
+            area = ambiente.largura * ambiente.altura
+            tamanho_celula = max(25, math.sqrt(area / max(1, len(self.recursos))))
+        self.tamanho_celula = tamanho_celula
+        self.colunas = max(1, math.ceil(ambiente.largura / tamanho_celula))
+        self.linhas = max(1, math.ceil(ambiente.altura / tamanho_celula))
+        self.coordenadas = [(r['x'], r['y']) for r in self.recursos]
+        # O último balde reúne recursos fora da grade, examinados em toda consulta
+        fora = self.linhas * self.colunas
+        self.celula_recurso = []
+        for x, y in self.coordenadas:
+            celula = self._celula(x, y)
+            self.celula_recurso.append(fora if celula is None
+                                       else celula[0] * self.colunas + celula[1])
+        self.sincronizar()
+
+    def _celula(self, x, y):
+        i = int(y // self.tamanho_celula)
+        j = int(x // self.tamanho_celula)
+        if 0 <= i < self.linhas and 0 <= j < self.colunas:
+            return i, j
+        return None
+
+    def sincronizar(self):
+        # Refaz os baldes a partir das marcas 'coletado' dos recursos
+        self.baldes = [[] for _ in range(self.linhas * self.colunas + 1)]
+        self.posicao = [0] * len(self.recursos)
+        self.pendentes = 0
+        self._primeiro = 0
+        for k, recurso in enumerate(self.recursos):
+            if not recurso['coletado']:
+                balde = self.baldes[self.celula_recurso[k]]
+                self.posicao[k] = len(balde)
+                balde.append(k)
+                self.pendentes += 1
+
+    def _remover(self, k):
+        balde = self.baldes[self.celula_recurso[k]]
+        ultimo = balde.pop()
+        if ultimo != k:
+            balde[self.posicao[k]] = ultimo
+            self.posicao[ultimo] = self.posicao[k]
+        self.pendentes -= 1
+
+    def primeiro_pendente(self):
+        """Índice do primeiro recurso não coletado da lista (len(recursos) se nenhum)"""
+        # Só avança entre resets, então o custo é O(1) amortizado
+        while self._primeiro < len(self.recursos) and self.recursos[self._primeiro]['coletado']:
+            self._primeiro += 1
+        return self._primeiro
+
+    def _celulas_no_anel(self, i, j, anel):
+        if anel == 0:
+            yield i, j
+            return
+        for jj in range(max(0, j - anel), min(self.colunas, j + anel + 1)):
+            if i - anel >= 0:
+                yield i - anel, jj
+            if i + anel < self.linhas:
+                yield i + anel, jj
+        for ii in range(max(0, i - anel + 1), min(self.linhas, i + anel)):
+            if j - anel >= 0:
+                yield ii, j - anel
+            if j + anel < self.colunas:
+                yield ii, j + anel
+
+    def mais_proximo(self, x, y):
+        """Devolve (distância, índice) do recurso não coletado mais próximo; (inf, None) se não há"""
+        melhor, indice = float('inf'), None
+        if not self.pendentes:
+            return melhor, indice
+        celula = self._celula(x, y)
+        if celula is None:
+            baldes = self.baldes
+        else:
+            # Um recurso no anel r está a mais de (r - 1) * tamanho_celula do ponto
+            i, j = celula
+            alcance = max(i, self.linhas - 1 - i, j, self.colunas - 1 - j)
+            baldes = [self.baldes[-1]]
+            for anel in range(alcance + 1):
+                if melhor <= (anel - 1) * self.tamanho_celula:
+                    break
+                for ii, jj in self._celulas_no_anel(i, j, anel):
+                    for k in self.baldes[ii * self.colunas + jj]:
+                        rx, ry = self.coordenadas[k]
+                        dist = np.sqrt((x - rx)**2 + (y - ry)**2)
+                        if dist < melhor:
+                            melhor, indice = dist, k
+        for balde in baldes:
+            for k in balde:
+                rx, ry = self.coordenadas[k]
+                dist = np.sqrt((x - rx)**2 + (y - ry)**2)
+                if dist < melhor:
+                    melhor, indice = dist, k
+        return melhor, indice
+
+    def coletar(self, x, y, alcance):
+        """Marca como coletados os recursos a menos de alcance do ponto; devolve quantos"""
+        if not self.pendentes:
+            return 0
+        c = self.tamanho_celula
+        i0, i1 = max(0, int((y - alcance) // c)), min(self.linhas - 1, int((y + alcance) // c))
+        j0, j1 = max(0, int((x - alcance) // c)), min(self.colunas - 1, int((x + alcance) // c))
+        candidatos = [k for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)
+                      for k in self.baldes[i * self.colunas + j]]
+        candidatos.extend(self.baldes[-1])
+        coletados = 0
+        for k in candidatos:
+            rx, ry = self.coordenadas[k]
+            if np.sqrt((x - rx)**2 + (y - ry)**2) < alcance:
+                self.recursos[k]['coletado'] = True
+                self._remover(k)
+                coletados += 1
+        return coletados
+
+
+def _jit(funcao):
+    return numba.njit(cache=True)(funcao) if numba is not None else funcao
+
+
+@_jit
+def _kernel_parado(x, y, ultimo_x, ultimo_y, tempo_parado):
+    # Contador de passos parado (menos de 0.1 unidades desde a última posição)
+    if np.sqrt((x - ultimo_x)**2 + (y - ultimo_y)**2) < 0.1:
+        return tempo_parado + 1
+    return 0
+
+
+@_jit
+def _kernel_deslocar(x, y, angulo, velocidade, aceleracao, retangulos, largura, altura, raio):
+    # Velocidade, nova posição e colisão (bordas e retângulos x, y, largura, altura).
+    # Devolve (x, y, velocidade, colidiu, distância percorrida)
+    velocidade = max(0.1, min(5.0, velocidade + aceleracao))
+    novo_x = x + velocidade * np.cos(angulo)
+    novo_y = y + velocidade * np.sin(angulo)
+    colidiu = (novo_x - raio < 0 or novo_x + raio > largura or
+               novo_y - raio < 0 or novo_y + raio > altura)
+    if not colidiu:
+        for k in range(retangulos.shape[0]):
+            ox, oy = retangulos[k, 0], retangulos[k, 1]
+            if (novo_x + raio > ox and novo_x - raio < ox + retangulos[k, 2] and
+                    novo_y + raio > oy and novo_y - raio < oy + retangulos[k, 3]):
+                colidiu = True
+                break
+    if colidiu:
+        return x, y, 0.1, True, 0.0
+    return novo_x, novo_y, velocidade, False, np.sqrt((novo_x - x)**2 + (novo_y - y)**2)
+
+
+@_jit
+def _kernel_energia(energia, velocidade, rotacao, recursos_coletados):
+    energia = max(0.0, energia - (0.1 + 0.05 * velocidade + 0.1 * abs(rotacao)))
+    if recursos_coletados > 0:
+        energia = min(100.0, energia + 20 * recursos_coletados)
+    return energia
+
+
+# Os kernels só são usados quando pedidos (ativar_kernel_fisico ou ROBO_KERNEL_FISICO=1)
+# e o Numba está instalado; o caminho em Python puro continua sendo o padrão
+KERNEL_FISICO = numba is not None and os.environ.get('ROBO_KERNEL_FISICO') == '1'
+
+
+def _retangulos_obstaculos(ambiente):
+    # Obstáculos como array (n, 4) para os kernels; como a GradeObstaculos,
+    # supõe que os obstáculos não mudam depois de criados
+    retangulos = getattr(ambiente, '_retangulos', None)
+    if retangulos is None:
+        retangulos = np.array([[o['x'], o['y'], o['largura'], o['altura']]
+                               for o in ambiente.obstaculos], dtype=np.float64).reshape(-1, 4)
+        ambiente._retangulos = retangulos
+    return retangulos
+
+
+def verificar_kernel_fisico(passos=2000, sementes=range(5)):
+    """Compara Robo._mover_kernel com Robo._mover_python em episódios semeados.
+
+    Cada semente gera um mapa e uma sequência de comandos; os dois caminhos
+    partem do mesmo estado de random e devem produzir trajetórias idênticas.
+    Devolve as divergências como (semente, passo, campo).
+    """
+    campos = ('x', 'y', 'angulo', 'velocidade', 'energia', 'colisoes',
+              'distancia_percorrida', 'tempo_parado', 'recursos_coletados', 'meta_atingida')
+    divergencias = []
+    for semente in sementes:
+        trajetorias = []
+        for mover in (Robo._mover_python, Robo._mover_kernel):
+            with fluxo_aleatorio(semente):
+                ambiente = Ambiente()
+                robo = Robo(*ambiente.posicao_segura())
+                comandos = random.Random(semente)
+                estados = []
+                for _ in range(passos):
+                    aceleracao = comandos.uniform(-1, 1)
+                    rotacao = comandos.uniform(-0.5, 0.5)
+                    if mover(robo, aceleracao, rotacao, ambiente):
+                        ambiente.reset()
+                        robo.reset(*ambiente.posicao_segura())
+                    estados.append(tuple(getattr(robo, campo) for campo in campos))
+                trajetorias.append(estados)
+        for passo, (a, b) in enumerate(zip(*trajetorias)):
+            for campo, va, vb in zip(campos, a, b):
+                if va != vb:
+                    divergencias.append((semente, passo, campo))
+    return divergencias
+
+
+def ativar_kernel_fisico(verificar=True):
+    """Faz Robo.mover usar os kernels compilados pelo Numba.
+
+    Com verificar, roda antes verificar_kernel_fisico e recusa ativar se os
+    dois caminhos divergirem. Também define ROBO_KERNEL_FISICO, para que
+    processos iniciados depois (workers, ilhas) usem os mesmos kernels.
+    """
+    global KERNEL_FISICO
+    if numba is None:
+        raise RuntimeError("Numba não está instalado; os kernels de física não estão disponíveis")
+    if verificar:
+        divergencias = verificar_kernel_fisico()
+        if divergencias:
+            raise RuntimeError(f"Kernels de física divergem do caminho em Python "
+                               f"({len(divergencias)} divergências; primeira: {divergencias[0]})")
+    KERNEL_FISICO = True
+    os.environ['ROBO_KERNEL_FISICO'] = '1'
+
+
 class Robo:
     def __init__(self, x, y, raio=15):
         self.x = x
@@ -203,6 +686,11 @@ class Robo:
         self.meta_atingida = False
 
     def mover(self, aceleracao, rotacao, ambiente):
+        if KERNEL_FISICO:
+            return self._mover_kernel(aceleracao, rotacao, ambiente)
+        return self._mover_python(aceleracao, rotacao, ambiente)
+
+    def _mover_python(self, aceleracao, rotacao, ambiente):
         # Atualizar ângulo
         self.angulo += rotacao
 
@@ -265,32 +753,69 @@ class Robo:
 
         return self.energia <= 0
 
+    def _mover_kernel(self, aceleracao, rotacao, ambiente):
+        # Mesma física de _mover_python, com as contas nos kernels; os sorteios
+        # continuam aqui, na mesma ordem, para consumir o random igual
+        self.angulo += rotacao
+        self.tempo_parado = _kernel_parado(self.x, self.y, self.ultima_posicao[0],
+                                           self.ultima_posicao[1], self.tempo_parado)
+        if self.tempo_parado > 5:
+            aceleracao = max(0.2, aceleracao)
+            rotacao = random.uniform(-0.2, 0.2)
+
+        self.x, self.y, self.velocidade, colidiu, passo = _kernel_deslocar(
+            self.x, self.y, self.angulo, self.velocidade, aceleracao,
+            _retangulos_obstaculos(ambiente), ambiente.largura, ambiente.altura, self.raio)
+        if colidiu:
+            self.colisoes += 1
+            self.angulo += random.uniform(-np.pi/4, np.pi/4)
+        else:
+            self.distancia_percorrida += passo
+        self.ultima_posicao = (self.x, self.y)
+
+        recursos_coletados = ambiente.verificar_coleta_recursos(self.x, self.y, self.raio)
+        self.recursos_coletados += recursos_coletados
+        if not self.meta_atingida and ambiente.verificar_atingir_meta(self.x, self.y, self.raio):
+            self.meta_atingida = True
+            self.energia = min(100, self.energia + 50)
+
+        self.energia = _kernel_energia(self.energia, self.velocidade, rotacao, recursos_coletados)
+        return self.energia <= 0
+
     def get_sensores(self, ambiente):
-        # Distância até o recurso mais próximo
-        dist_recurso = float('inf')
-        for recurso in ambiente.recursos:
-            if not recurso['coletado']:
-                dist = np.sqrt(
-                    (self.x - recurso['x'])**2 + (self.y - recurso['y'])**2)
-                dist_recurso = min(dist_recurso, dist)
+        # Distância até o recurso mais próximo (consulta por baldes quando há índice)
+        indice = ambiente.indice_recursos
+        if indice is not None:
+            dist_recurso, _ = indice.mais_proximo(self.x, self.y)
+        else:
+            dist_recurso = float('inf')
+            for recurso in ambiente.recursos:
+                if not recurso['coletado']:
+                    dist = np.sqrt(
+                        (self.x - recurso['x'])**2 + (self.y - recurso['y'])**2)
+                    dist_recurso = min(dist_recurso, dist)
 
-        # Distância até o obstáculo mais próximo
-        dist_obstaculo = float('inf')
-        for obstaculo in ambiente.obstaculos:
-            # Simplificação: considerar apenas a distância até o centro do obstáculo
-            centro_x = obstaculo['x'] + obstaculo['largura'] / 2
-            centro_y = obstaculo['y'] + obstaculo['altura'] / 2
-            dist = np.sqrt((self.x - centro_x)**2 + (self.y - centro_y)**2)
-            dist_obstaculo = min(dist_obstaculo, dist)
+        # Distância até o obstáculo mais próximo (consulta O(1) quando há grade)
+        dist_obstaculo = None
+        if ambiente.grade is not None:
+            dist_obstaculo = ambiente.grade.dist_obstaculo(self.x, self.y)
+        if dist_obstaculo is None:
+            dist_obstaculo = ambiente.dist_obstaculo_exata(self.x, self.y)
 
         # Distância até a meta
         dist_meta = np.sqrt(
             (self.x - ambiente.meta['x'])**2 + (self.y - ambiente.meta['y'])**2)
 
         # Ângulo até o recurso mais próximo
+        # Na verdade é o ângulo até o primeiro recurso não coletado da lista, que
+        # nem sempre é o mais próximo. Os controladores evoluídos (e o
+        # melhor_robo.json) dependem desse sensor como está, então ele é mantido
         angulo_recurso = 0
         if dist_recurso < float('inf'):
-            for recurso in ambiente.recursos:
+            recursos = ambiente.recursos
+            if indice is not None:
+                recursos = (recursos[indice.primeiro_pendente()],)
+            for recurso in recursos:
                 if not recurso['coletado']:
                     dx = recurso['x'] - self.x
                     dy = recurso['y'] - self.y
@@ -325,12 +850,116 @@ class Robo:
         }
 
 
+class Trajetoria:
+    """Estado passo a passo de um episódio em buffers NumPy pré-alocados.
+
+    A linha i é o estado ao fim do passo i (a linha 0 é o estado inicial) e
+    aceleracao[i]/rotacao[i] são as ações, já limitadas, que levaram a ele.
+    salvar() grava um .npz compacto ou, sem extensão, um diretório de .npy
+    que carregar() abre com memória mapeada; reprodução e análise não
+    precisam reexecutar as árvores nem a física.
+    """
+
+    CAMPOS = {
+        'x': np.float64, 'y': np.float64, 'angulo': np.float64,
+        'velocidade': np.float64, 'energia': np.float64,
+        'distancia': np.float64, 'colisoes': np.int32, 'tempo': np.int32,
+        'meta_atingida': np.bool_, 'aceleracao': np.float64, 'rotacao': np.float64,
+    }
+
+    def __init__(self, ambiente, raio=15, capacidade=None):
+        capacidade = (capacidade or ambiente.max_tempo) + 1
+        self.n = 0
+        self.buffers = {nome: np.zeros(capacidade, dtype=tipo)
+                        for nome, tipo in self.CAMPOS.items()}
+        self.buffers['coletado'] = np.zeros((capacidade, len(ambiente.recursos)), dtype=bool)
+
+        # Cena estática
+        self.cena = ambiente.cena()
+        self.cena['raio'] = np.float64(raio)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, campo):
+        # Vista apenas dos passos registrados
+        return self.buffers[campo][:self.n]
+
+    def registrar(self, robo, ambiente, aceleracao=np.nan, rotacao=np.nan):
+        if self.n == len(self.buffers['x']):
+            for nome, buffer in self.buffers.items():
+                extra = np.zeros_like(buffer)
+                self.buffers[nome] = np.concatenate([buffer, extra])
+        i = self.n
+        b = self.buffers
+        b['x'][i] = robo.x
+        b['y'][i] = robo.y
+        b['angulo'][i] = robo.angulo
+        b['velocidade'][i] = robo.velocidade
+        b['energia'][i] = robo.energia
+        b['distancia'][i] = robo.distancia_percorrida
+        b['colisoes'][i] = robo.colisoes
+        b['tempo'][i] = ambiente.tempo
+        b['meta_atingida'][i] = robo.meta_atingida
+        b['aceleracao'][i] = aceleracao
+        b['rotacao'][i] = rotacao
+        b['coletado'][i] = [r['coletado'] for r in ambiente.recursos]
+        self.n += 1
+
+    def estado(self, i):
+        """Estado da linha i no formato usado por Renderizador"""
+        coletado = self.buffers['coletado'][i]
+        return {
+            'x': float(self.buffers['x'][i]),
+            'y': float(self.buffers['y'][i]),
+            'angulo': float(self.buffers['angulo'][i]),
+            'raio': float(self.cena['raio']),
+            'tempo': int(self.buffers['tempo'][i]),
+            'recursos_coletados': int(coletado.sum()),
+            'energia': float(self.buffers['energia'][i]),
+            'colisoes': int(self.buffers['colisoes'][i]),
+            'distancia_percorrida': float(self.buffers['distancia'][i]),
+            'meta_atingida': bool(self.buffers['meta_atingida'][i]),
+            'coletado': coletado.tolist(),
+        }
+
+    def ambiente(self):
+        """Reconstrói um Ambiente com a cena gravada (sem consumir o random)"""
+        return Ambiente.de_cena(self.cena)
+
+    def salvar(self, arquivo):
+        dados = {nome: self[nome] for nome in self.buffers}
+        dados.update({f"cena_{nome}": valor for nome, valor in self.cena.items()})
+        if arquivo.endswith('.npz'):
+            np.savez_compressed(arquivo, **dados)
+        else:
+            os.makedirs(arquivo, exist_ok=True)
+            for nome, valor in dados.items():
+                np.save(os.path.join(arquivo, f"{nome}.npy"), valor)
+
+    @classmethod
+    def carregar(cls, arquivo):
+        if arquivo.endswith('.npz'):
+            with np.load(arquivo) as npz:
+                dados = {nome: npz[nome] for nome in npz.files}
+        else:
+            dados = {nome[:-4]: np.load(os.path.join(arquivo, nome), mmap_mode='r')
+                     for nome in os.listdir(arquivo) if nome.endswith('.npy')}
+        trajetoria = cls.__new__(cls)
+        trajetoria.cena = {nome[5:]: valor for nome, valor in dados.items()
+                           if nome.startswith('cena_')}
+        trajetoria.buffers = {nome: valor for nome, valor in dados.items()
+                              if not nome.startswith('cena_')}
+        trajetoria.n = len(trajetoria.buffers['x'])
+        return trajetoria
+
+
 class Simulador:
     def __init__(self, ambiente, robo, individuo):
         self.ambiente = ambiente
         self.robo = robo
         self.individuo = individuo
-        self.frames = []
+        self.trajetoria = None  # Trajetoria gravada pela última simulação
 
         # Configurar matplotlib para melhor visualização
         plt.style.use('default')  # Usar estilo padrão
@@ -344,206 +973,31 @@ class Simulador:
         self.ax.set_ylabel("Y", fontsize=12)
         self.ax.grid(True, linestyle='--', alpha=0.7)
 
-    def simular(self):
-        self.ambiente.reset()
-        # Encontrar uma posição segura para o robô
-        x_inicial, y_inicial = self.ambiente.posicao_segura(self.robo.raio)
-        self.robo.reset(x_inicial, y_inicial)
-        self.frames = []
-
-        # Limpar a figura atual
+    def simular(self, passos_por_quadro=1, pausa=0.0):
+        # A cena é montada uma vez pelo Renderizador e só os artistas dinâmicos
+        # são redesenhados a cada quadro, em vez de limpar e recriar tudo por passo
+        renderizador = Renderizador(self.ambiente, self.robo, self.individuo, passos_por_quadro)
         self.ax.clear()
-        self.ax.set_xlim(0, self.ambiente.largura)
-        self.ax.set_ylim(0, self.ambiente.altura)
-        self.ax.set_title(
-            "Simulador de Robô com Programação Genética", fontsize=14)
-        self.ax.set_xlabel("X", fontsize=12)
-        self.ax.set_ylabel("Y", fontsize=12)
-        self.ax.grid(True, linestyle='--', alpha=0.7)
-
-        # Desenhar obstáculos (estáticos)
-        for obstaculo in self.ambiente.obstaculos:
-            rect = patches.Rectangle(
-                (obstaculo['x'], obstaculo['y']),
-                obstaculo['largura'],
-                obstaculo['altura'],
-                linewidth=1,
-                edgecolor='black',
-                facecolor='#FF9999',  # Vermelho claro
-                alpha=0.7
-            )
-            self.ax.add_patch(rect)
-
-        # Desenhar recursos (estáticos)
-        for recurso in self.ambiente.recursos:
-            if not recurso['coletado']:
-                circ = patches.Circle(
-                    (recurso['x'], recurso['y']),
-                    10,
-                    linewidth=1,
-                    edgecolor='black',
-                    facecolor='#99FF99',  # Verde claro
-                    alpha=0.8
-                )
-                self.ax.add_patch(circ)
-
-        # Desenhar a meta
-        meta_circ = patches.Circle(
-            (self.ambiente.meta['x'], self.ambiente.meta['y']),
-            self.ambiente.meta['raio'],
-            linewidth=2,
-            edgecolor='black',
-            facecolor='#FFFF00',  # Amarelo
-            alpha=0.8
-        )
-        self.ax.add_patch(meta_circ)
-
-        # Criar objetos para o robô e direção (serão atualizados)
-        robo_circ = patches.Circle(
-            (self.robo.x, self.robo.y),
-            self.robo.raio,
-            linewidth=1,
-            edgecolor='black',
-            facecolor='#9999FF',  # Azul claro
-            alpha=0.8
-        )
-        self.ax.add_patch(robo_circ)
-
-        # Criar texto para informações
-        info_text = self.ax.text(
-            10, self.ambiente.altura - 50,  # Alterado de 10 para 50 para descer a legenda
-            "",
-            fontsize=12,
-            bbox=dict(facecolor='white', alpha=0.8,
-                      edgecolor='gray', boxstyle='round,pad=0.5')
-        )
-
-        # Atualizar a figura
-        plt.draw()
-        plt.pause(0.01)
-
-        try:
-            while True:
-                # Obter sensores
-                sensores = self.robo.get_sensores(self.ambiente)
-
-                # Avaliar árvores de decisão
-                aceleracao = self.individuo.avaliar(sensores, 'aceleracao')
-                rotacao = self.individuo.avaliar(sensores, 'rotacao')
-
-                # Limitar valores
-                aceleracao = max(-1, min(1, aceleracao))
-                rotacao = max(-0.5, min(0.5, rotacao))
-
-                # Mover robô
-                sem_energia = self.robo.mover(
-                    aceleracao, rotacao, self.ambiente)
-
-                # Atualizar visualização em tempo real
-                self.ax.clear()
-                self.ax.set_xlim(0, self.ambiente.largura)
-                self.ax.set_ylim(0, self.ambiente.altura)
-                self.ax.set_title(
-                    "Simulador de Robô com Programação Genética", fontsize=14)
-                self.ax.set_xlabel("X", fontsize=12)
-                self.ax.set_ylabel("Y", fontsize=12)
-                self.ax.grid(True, linestyle='--', alpha=0.7)
-
-                # Desenhar obstáculos
-                for obstaculo in self.ambiente.obstaculos:
-                    rect = patches.Rectangle(
-                        (obstaculo['x'], obstaculo['y']),
-                        obstaculo['largura'],
-                        obstaculo['altura'],
-                        linewidth=1,
-                        edgecolor='black',
-                        facecolor='#FF9999',
-                        alpha=0.7
-                    )
-                    self.ax.add_patch(rect)
-
-                # Desenhar recursos
-                for recurso in self.ambiente.recursos:
-                    if not recurso['coletado']:
-                        circ = patches.Circle(
-                            (recurso['x'], recurso['y']),
-                            10,
-                            linewidth=1,
-                            edgecolor='black',
-                            facecolor='#99FF99',
-                            alpha=0.8
-                        )
-                        self.ax.add_patch(circ)
-
-                # Desenhar a meta
-                meta_circ = patches.Circle(
-                    (self.ambiente.meta['x'], self.ambiente.meta['y']),
-                    self.ambiente.meta['raio'],
-                    linewidth=2,
-                    edgecolor='black',
-                    facecolor='#FFFF00',  # Amarelo
-                    alpha=0.8
-                )
-                self.ax.add_patch(meta_circ)
-
-                # Desenhar robô
-                robo_circ = patches.Circle(
-                    (self.robo.x, self.robo.y),
-                    self.robo.raio,
-                    linewidth=1,
-                    edgecolor='black',
-                    facecolor='#9999FF',
-                    alpha=0.8
-                )
-                self.ax.add_patch(robo_circ)
-
-                # Desenhar direção do robô
-                direcao_x = self.robo.x + self.robo.raio * \
-                    np.cos(self.robo.angulo)
-                direcao_y = self.robo.y + self.robo.raio * \
-                    np.sin(self.robo.angulo)
-                self.ax.plot([self.robo.x, direcao_x], [
-                             self.robo.y, direcao_y], 'r-', linewidth=2)
-
-                # Adicionar informações
-                info_text = self.ax.text(
-                    10, self.ambiente.altura - 50,  # Alterado de 10 para 50 para descer a legenda
-                    f"Tempo: {self.ambiente.tempo}\n"
-                    f"Recursos: {self.robo.recursos_coletados}\n"
-                    f"Energia: {self.robo.energia:.1f}\n"
-                    f"Colisões: {self.robo.colisoes}\n"
-                    f"Distância: {self.robo.distancia_percorrida:.1f}\n"
-                    f"Meta atingida: {'Sim' if self.robo.meta_atingida else 'Não'}",
-                    fontsize=12,
-                    bbox=dict(facecolor='white', alpha=0.8,
-                              edgecolor='gray', boxstyle='round,pad=0.5')
-                )
-
-                # Atualizar a figura
-                plt.draw()
-                plt.pause(0.05)
-
-                # Verificar fim da simulação
-                if sem_energia or self.ambiente.passo():
-                    break
-
-            # Manter a figura aberta até que o usuário a feche
-            plt.ioff()
-            plt.show()
-
-        except KeyboardInterrupt:
-            plt.close('all')
-
-        return self.frames
+        renderizador.exibir(pausa, ax=self.ax)
+        self.trajetoria = renderizador.trajetoria
+        return self.trajetoria
+
+    def animar(self, trajetoria=None):
+        # Reproduz uma trajetória gravada (por padrão a da última simulação)
+        # sem reavaliar as árvores nem a física
+        if trajetoria is not None:
+            self.trajetoria = trajetoria
+        self._renderizador = Renderizador.de_trajetoria(self.trajetoria)
+        self.ax.clear()
+        self._artistas = self._renderizador._montar(self.ax, animado=True)
 
-    def animar(self):
         # Desativar o modo interativo antes de criar a animação
         plt.ioff()
 
         # Criar a animação
         anim = animation.FuncAnimation(
             self.fig, self.atualizar_frame,
-            frames=len(self.frames),
+            frames=len(self.trajetoria),
             interval=50,
             blit=True,
             repeat=True  # Permitir que a animação repita
@@ -551,9 +1005,186 @@ class Simulador:
 
         # Mostrar a animação e manter a janela aberta
         plt.show(block=True)
+        return anim
 
     def atualizar_frame(self, frame_idx):
-        return self.frames[frame_idx]
+        self._renderizador._atualizar(self.trajetoria.estado(frame_idx))
+        return self._artistas
+
+
+class Renderizador:
+    """Visualização rápida de um episódio, sem redesenhar a cena a cada passo.
+
+    Obstáculos e meta são criados uma única vez; a cada quadro só o robô, a
+    linha de direção, os recursos e o texto são atualizados (com blitting em
+    exibir). passos_por_quadro > 1 avança vários passos por quadro. gravar()
+    escreve MP4/GIF via matplotlib.animation sem backend interativo. Com uma
+    Trajetoria o episódio gravado é reproduzido sem simular de novo; na
+    simulação ao vivo a trajetória fica em self.trajetoria.
+    """
+
+    def __init__(self, ambiente, robo, individuo, passos_por_quadro=1, trajetoria=None):
+        self.ambiente = ambiente
+        self.robo = robo
+        self.individuo = individuo
+        self.passos_por_quadro = max(1, int(passos_por_quadro))
+        self.trajetoria = trajetoria
+        self._reproducao = trajetoria is not None
+
+    @classmethod
+    def de_trajetoria(cls, trajetoria, passos_por_quadro=1):
+        return cls(trajetoria.ambiente(), None, None, passos_por_quadro, trajetoria)
+
+    def _montar(self, ax, animado):
+        ax.set_xlim(0, self.ambiente.largura)
+        ax.set_ylim(0, self.ambiente.altura)
+        ax.set_title("Simulador de Robô com Programação Genética", fontsize=14)
+        ax.set_xlabel("X", fontsize=12)
+        ax.set_ylabel("Y", fontsize=12)
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+        for obstaculo in self.ambiente.obstaculos:
+            ax.add_patch(patches.Rectangle(
+                (obstaculo['x'], obstaculo['y']), obstaculo['largura'], obstaculo['altura'],
+                linewidth=1, edgecolor='black', facecolor='#FF9999', alpha=0.7))
+
+        ax.add_patch(patches.Circle(
+            (self.ambiente.meta['x'], self.ambiente.meta['y']), self.ambiente.meta['raio'],
+            linewidth=2, edgecolor='black', facecolor='#FFFF00', alpha=0.8))
+
+        # Artistas dinâmicos: com blitting ficam fora do fundo (animated=True)
+        self._recursos = []
+        for recurso in self.ambiente.recursos:
+            circ = patches.Circle((recurso['x'], recurso['y']), 10, linewidth=1,
+                                  edgecolor='black', facecolor='#99FF99', alpha=0.8,
+                                  animated=animado)
+            ax.add_patch(circ)
+            self._recursos.append(circ)
+        self._robo = patches.Circle((0, 0), 15, linewidth=1, edgecolor='black',
+                                    facecolor='#9999FF', alpha=0.8, animated=animado)
+        ax.add_patch(self._robo)
+        self._direcao, = ax.plot([], [], 'r-', linewidth=2, animated=animado)
+        self._info = ax.text(
+            10, self.ambiente.altura - 50, "", fontsize=12, animated=animado,
+            bbox=dict(facecolor='white', alpha=0.8, edgecolor='gray', boxstyle='round,pad=0.5'))
+        return self._recursos + [self._robo, self._direcao, self._info]
+
+    def _atualizar(self, estado):
+        x, y, angulo, raio = estado['x'], estado['y'], estado['angulo'], estado['raio']
+        self._robo.center = (x, y)
+        self._robo.set_radius(raio)
+        self._direcao.set_data([x, x + raio * np.cos(angulo)], [y, y + raio * np.sin(angulo)])
+        self._info.set_text(
+            f"Tempo: {estado['tempo']}\n"
+            f"Recursos: {estado['recursos_coletados']}\n"
+            f"Energia: {estado['energia']:.1f}\n"
+            f"Colisões: {estado['colisoes']}\n"
+            f"Distância: {estado['distancia_percorrida']:.1f}\n"
+            f"Meta atingida: {'Sim' if estado['meta_atingida'] else 'Não'}")
+        for circ, coletado in zip(self._recursos, estado['coletado']):
+            circ.set_visible(not coletado)
+
+    def _estado_atual(self):
+        robo = self.robo
+        return {
+            'x': robo.x, 'y': robo.y, 'angulo': robo.angulo, 'raio': robo.raio,
+            'tempo': self.ambiente.tempo,
+            'recursos_coletados': robo.recursos_coletados,
+            'energia': robo.energia,
+            'colisoes': robo.colisoes,
+            'distancia_percorrida': robo.distancia_percorrida,
+            'meta_atingida': robo.meta_atingida,
+            'coletado': [recurso['coletado'] for recurso in self.ambiente.recursos],
+        }
+
+    def _quadros(self):
+        if self._reproducao:
+            ultimo = len(self.trajetoria) - 1
+            for i in range(0, ultimo + 1):
+                if i % self.passos_por_quadro == 0 or i == ultimo:
+                    yield self.trajetoria.estado(i)
+            return
+
+        # Mesmo laço de Simulador.simular, gravando a trajetória
+        self.ambiente.reset()
+        x_inicial, y_inicial = self.ambiente.posicao_segura(self.robo.raio)
+        self.robo.reset(x_inicial, y_inicial)
+        self.trajetoria = Trajetoria(self.ambiente, self.robo.raio)
+        self.trajetoria.registrar(self.robo, self.ambiente)
+        yield self._estado_atual()
+        passo = 0
+        while True:
+            sensores = self.robo.get_sensores(self.ambiente)
+            aceleracao, rotacao = self.individuo.avaliar_par(sensores)
+            aceleracao = max(-1, min(1, aceleracao))
+            rotacao = max(-0.5, min(0.5, rotacao))
+            sem_energia = self.robo.mover(aceleracao, rotacao, self.ambiente)
+            fim = sem_energia or self.ambiente.passo()
+            self.trajetoria.registrar(self.robo, self.ambiente, aceleracao, rotacao)
+            passo += 1
+            if fim or passo % self.passos_por_quadro == 0:
+                yield self._estado_atual()
+            if fim:
+                return
+
+    def exibir(self, pausa=0.0, ax=None):
+        """Mostra o episódio numa janela interativa usando blitting (em ax, se dado)"""
+        if ax is None:
+            fig, ax = plt.subplots(figsize=(12, 8))
+        else:
+            fig = ax.figure
+        dinamicos = self._montar(ax, animado=True)
+        canvas = fig.canvas
+        plt.show(block=False)
+        canvas.draw()
+        fundo = canvas.copy_from_bbox(fig.bbox) if canvas.supports_blit else None
+        if fundo is None:
+            # Backend sem suporte a blitting: redesenha a figura inteira
+            for artista in dinamicos:
+                artista.set_animated(False)
+
+        try:
+            for estado in self._quadros():
+                self._atualizar(estado)
+                if fundo is None:
+                    canvas.draw_idle()
+                else:
+                    canvas.restore_region(fundo)
+                    for artista in dinamicos:
+                        ax.draw_artist(artista)
+                    canvas.blit(fig.bbox)
+                canvas.flush_events()
+                if pausa:
+                    time.sleep(pausa)
+            # Mantém a janela aberta até que o usuário a feche
+            plt.ioff()
+            plt.show()
+        except KeyboardInterrupt:
+            plt.close(fig)
+
+    def gravar(self, arquivo, fps=20, dpi=80):
+        """Grava o episódio em .gif (Pillow) ou .mp4 (ffmpeg) e devolve o número de quadros"""
+        # Figura Agg independente do pyplot: funciona em servidores sem display
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        if arquivo.lower().endswith('.gif'):
+            escritor = animation.PillowWriter(fps=fps)
+        elif animation.writers.is_available('ffmpeg'):
+            escritor = animation.FFMpegWriter(fps=fps)
+        else:
+            raise RuntimeError("ffmpeg não está disponível; grave em .gif ou instale o ffmpeg")
+
+        fig = Figure(figsize=(12, 8))
+        FigureCanvasAgg(fig)
+        self._montar(fig.add_subplot(), animado=False)
+        quadros = 0
+        with escritor.saving(fig, arquivo, dpi):
+            for estado in self._quadros():
+                self._atualizar(estado)
+                escritor.grab_frame()
+                quadros += 1
+        return quadros
 
 # =====================================================================
 # PARTE 2: ALGORITMO GENÉTICO (PARA O VOCÊ MODIFICAR)
@@ -569,37 +1200,661 @@ class Simulador:
 # 5. Melhoria no sistema de fitness para considerar múltiplos objetivos
 # 6. Otimização dos parâmetros do algoritmo genético
 
+OPERADORES_UNARIOS = ('abs', 'sin', 'cos', 'log_safe')
+OPERADORES = ('+', '-', '*', '/', 'max', 'min') + OPERADORES_UNARIOS
+
+
+def _gerar_codigo_no(no, linhas, variaveis, memo):
+    """Emite as instruções de um nó e devolve (expressão, resultado_sempre_finito).
+
+    Cada operador vira uma atribuição a um temporário seguida da mesma
+    verificação de NaN/inf feita em avaliar_no; a verificação é omitida
+    apenas quando o operador não pode produzir valores não finitos.
+    Nós internados repetidos (memo) são calculados uma única vez.
+    """
+    if no in memo:
+        return memo[no]
+
+    if no.operador is None:
+        if no.variavel is None:
+            valor = no.valor
+            if math.isfinite(valor):
+                return repr(valor), True
+            return f"float({repr(str(valor))})", False
+        # Folhas de sensor devolvem o valor cru (ex.: dist_recurso = inf)
+        if no.variavel not in variaveis:
+            variaveis[no.variavel] = f"v{len(variaveis)}"
+        return variaveis[no.variavel], False
+
+    op = no.operador
+    if op in OPERADORES_UNARIOS:
+        a, finito = _gerar_codigo_no(no.esquerda, linhas, variaveis, memo)
+        nome = f"t{len(memo)}"
+        if op == 'abs':
+            linhas.append(f"{nome} = abs({a})")
+        elif op in ('sin', 'cos'):
+            # math.sin/cos lançam ValueError para inf, o que avaliar_no trata como 0
+            if finito:
+                linhas.append(f"{nome} = _{op}({a})")
+            else:
+                linhas.append(f"{nome} = _{op}({a}) if _isfinite({a}) else 0")
+            finito = True
+        else:
+            linhas.append(f"{nome} = _log(abs({a}) + 1e-6)")
+        if not finito:
+            linhas.append(f"if not _isfinite({nome}): {nome} = 0")
+        memo[no] = (nome, True)
+        return nome, True
+
+    a, finito_a = _gerar_codigo_no(no.esquerda, linhas, variaveis, memo)
+    b, finito_b = _gerar_codigo_no(no.direita, linhas, variaveis, memo)
+    nome = f"t{len(memo)}"
+
+    finito = False
+    if op in ('+', '-', '*'):
+        linhas.append(f"{nome} = {a} {op} {b}")
+    elif op == '/':
+        linhas.append(f"{nome} = 0 if abs({b}) < 1e-6 else {a} / {b}")
+    elif op == 'max':
+        # Mesma semântica de max(a, b) para empates e NaN
+        linhas.append(f"{nome} = {b} if {b} > {a} else {a}")
+        finito = finito_a and finito_b
+    elif op == 'min':
+        linhas.append(f"{nome} = {b} if {b} < {a} else {a}")
+        finito = finito_a and finito_b
+    else:
+        linhas.append(f"{nome} = 0")
+        finito = True
+    if not finito:
+        linhas.append(f"if not _isfinite({nome}): {nome} = 0")
+    memo[no] = (nome, True)
+    return nome, True
+
+
+def gerar_fonte_raizes(raizes, nome_funcao='_arvore'):
+    """Gera uma função Python que avalia várias árvores internadas de uma vez.
+
+    Subárvores comuns às raízes (ex.: entre aceleração e rotação) são
+    calculadas uma única vez. Com uma raiz a função devolve o valor; com
+    mais, uma tupla na ordem das raízes.
+    """
+    linhas = []
+    variaveis = {}
+    memo = {}
+    resultados = [_gerar_codigo_no(raiz, linhas, variaveis, memo)[0] for raiz in raizes]
+
+    fonte = [f"def {nome_funcao}(sensores):"]
+    if variaveis:
+        fonte.append("    _get = sensores.get")
+    for variavel, nome in variaveis.items():
+        fonte.append(f"    {nome} = _get({variavel!r}, 0)")
+    fonte.extend(f"    {linha}" for linha in linhas)
+    fonte.append(f"    return {', '.join(resultados)}")
+    return "\n".join(fonte)
+
+
+def gerar_fonte_arvore(arvore, nome_funcao='_arvore'):
+    """Gera o código-fonte Python equivalente a IndividuoPG.avaliar_no(arvore, sensores)"""
+    return gerar_fonte_raizes([TabelaSubarvores().internar(arvore)], nome_funcao)
+
+
+def _compilar_raizes(raizes):
+    fonte = gerar_fonte_raizes(raizes)
+    namespace = {
+        '_isfinite': math.isfinite,
+        '_sin': math.sin,
+        '_cos': math.cos,
+        '_log': math.log,
+    }
+    exec(compile(fonte, '<arvore_pg>', 'exec'), namespace)
+    return namespace['_arvore']
+
+
+def compilar_arvore(arvore):
+    """Compila uma árvore em uma função sensores -> valor, uma única vez por árvore"""
+    return _compilar_raizes([TabelaSubarvores().internar(arvore)])
+
+
+def _zerar_nao_finitos(valores):
+    return np.where(np.isfinite(valores), valores, 0.0)
+
+
+def _dividir_protegido(esquerda, direita):
+    # Divisão mascarada: onde |direita| < 1e-6 o resultado é 0, como em avaliar_no
+    pequeno = np.abs(direita) < 1e-6
+    return np.where(pequeno, 0.0, esquerda / np.where(pequeno, 1.0, direita))
+
+
+# O np.log vetorizado (SIMD) pode diferir de math.log no último bit; para manter
+# a paridade exata com avaliar_no o log_safe em lote usa math.log por elemento
+_log_elemento = np.frompyfunc(math.log, 1, 1)
+
+
+def _log_protegido(valores):
+    return np.asarray(_log_elemento(np.abs(valores) + 1e-6), dtype=float)
+
+
+def _gerar_codigo_no_lote(no, linhas, variaveis, memo):
+    """Versão vetorizada de _gerar_codigo_no: cada temporário é um array NumPy"""
+    if no in memo:
+        return memo[no]
+
+    if no.operador is None:
+        if no.variavel is None:
+            valor = float(no.valor)
+            if math.isfinite(valor):
+                return repr(valor), True
+            return f"float({repr(str(valor))})", False
+        if no.variavel not in variaveis:
+            variaveis[no.variavel] = f"v{len(variaveis)}"
+        return variaveis[no.variavel], False
+
+    op = no.operador
+    if op in OPERADORES_UNARIOS:
+        a, finito = _gerar_codigo_no_lote(no.esquerda, linhas, variaveis, memo)
+        nome = f"t{len(memo)}"
+        if op == 'abs':
+            linhas.append(f"{nome} = _abs({a})")
+        elif op in ('sin', 'cos'):
+            linhas.append(f"{nome} = _{op}({a})")
+        else:
+            linhas.append(f"{nome} = _log({a})")
+        if not finito:
+            linhas.append(f"{nome} = _zerar({nome})")
+        memo[no] = (nome, True)
+        return nome, True
+
+    a, finito_a = _gerar_codigo_no_lote(no.esquerda, linhas, variaveis, memo)
+    b, finito_b = _gerar_codigo_no_lote(no.direita, linhas, variaveis, memo)
+    nome = f"t{len(memo)}"
+
+    finito = False
+    if op in ('+', '-', '*'):
+        linhas.append(f"{nome} = {a} {op} {b}")
+    elif op == '/':
+        linhas.append(f"{nome} = _div({a}, {b})")
+    elif op == 'max':
+        linhas.append(f"{nome} = _where({b} > {a}, {b}, {a})")
+        finito = finito_a and finito_b
+    elif op == 'min':
+        linhas.append(f"{nome} = _where({b} < {a}, {b}, {a})")
+        finito = finito_a and finito_b
+    else:
+        linhas.append(f"{nome} = 0.0")
+        finito = True
+    if not finito:
+        linhas.append(f"{nome} = _zerar({nome})")
+    memo[no] = (nome, True)
+    return nome, True
+
+
+def gerar_fonte_raizes_lote(raizes, nome_funcao='_arvore_lote'):
+    """Versão struct-of-arrays de gerar_fonte_raizes: devolve um array de n valores por raiz"""
+    linhas = []
+    variaveis = {}
+    memo = {}
+    resultados = [_gerar_codigo_no_lote(raiz, linhas, variaveis, memo)[0] for raiz in raizes]
+
+    fonte = [f"def {nome_funcao}(sensores, n):"]
+    if variaveis:
+        fonte.append("    _get = sensores.get")
+    for variavel, nome in variaveis.items():
+        fonte.append(f"    {nome} = _asarray(_get({variavel!r}, 0), dtype=float)")
+    if linhas:  # Árvores que se reduzem a uma constante ou variável não calculam nada
+        fonte.append("    with _errstate(all='ignore'):")
+        fonte.extend(f"        {linha}" for linha in linhas)
+    fonte.append(f"    return {', '.join(f'_saida({r}, n)' for r in resultados)}")
+    return "\n".join(fonte)
+
+
+def gerar_fonte_arvore_lote(arvore, nome_funcao='_arvore_lote'):
+    """Gera o código-fonte que avalia a árvore sobre arrays de sensores (struct-of-arrays)"""
+    return gerar_fonte_raizes_lote([TabelaSubarvores().internar(arvore)], nome_funcao)
+
+
+def _saida_lote(valores, n):
+    saida = np.empty(n)
+    saida[...] = valores
+    return saida
+
+
+def _compilar_raizes_lote(raizes):
+    fonte = gerar_fonte_raizes_lote(raizes)
+    namespace = {
+        '_asarray': np.asarray,
+        '_errstate': np.errstate,
+        '_abs': np.abs,
+        '_sin': np.sin,
+        '_cos': np.cos,
+        '_log': _log_protegido,
+        '_div': _dividir_protegido,
+        '_where': np.where,
+        '_zerar': _zerar_nao_finitos,
+        '_saida': _saida_lote,
+    }
+    exec(compile(fonte, '<arvore_pg_lote>', 'exec'), namespace)
+    return namespace['_arvore_lote']
+
+
+def compilar_arvore_lote(arvore):
+    """Compila uma árvore em uma função (sensores_em_arrays, n) -> array de n valores"""
+    return _compilar_raizes_lote([TabelaSubarvores().internar(arvore)])
+
+
+def _aplicar_operador(op, a, b=0):
+    # Mesma semântica protegida de IndividuoPG.avaliar_no para filhos já avaliados
+    try:
+        if op == 'abs':
+            resultado = abs(a)
+        elif op == 'sin':
+            resultado = math.sin(a)
+        elif op == 'cos':
+            resultado = math.cos(a)
+        elif op == 'log_safe':
+            resultado = math.log(abs(a) + 1e-6)
+        elif op == '+':
+            resultado = a + b
+        elif op == '-':
+            resultado = a - b
+        elif op == '*':
+            resultado = a * b
+        elif op == '/':
+            resultado = 0 if abs(b) < 1e-6 else a / b
+        elif op == 'max':
+            resultado = max(a, b)
+        elif op == 'min':
+            resultado = min(a, b)
+        else:
+            resultado = 0
+    except Exception:
+        resultado = 0
+    return float(resultado) if math.isfinite(resultado) else 0.0
+
+
+def _constante(no):
+    if no['tipo'] == 'folha' and 'valor' in no and math.isfinite(no['valor']):
+        return no['valor']
+    return None
+
+
+def _folha_constante(valor):
+    return {'tipo': 'folha', 'valor': float(valor)}
+
+
+def _simplificar_no(no):
+    """Devolve (nó simplificado, chave canônica) sem alterar o nó original.
+
+    A chave identifica subárvores equivalentes; + e * são comutativos, então
+    seus filhos entram ordenados na chave.
+    """
+    if no is None:
+        # Filho direito ausente em operador binário vale 0 em avaliar_no
+        return _folha_constante(0.0), ('c', 0.0)
+    if no['tipo'] == 'folha':
+        if 'valor' in no:
+            return no, ('c', no['valor'])
+        return no, ('v', no['variavel'])
+
+    op = no['operador']
+    esquerda, chave_esq = _simplificar_no(no['esquerda'])
+    a = _constante(esquerda)
+
+    if op in OPERADORES_UNARIOS:
+        if a is not None:
+            valor = _aplicar_operador(op, a)
+            return _folha_constante(valor), ('c', valor)
+        if op == 'abs' and esquerda['tipo'] == 'operador' and esquerda['operador'] == 'abs':
+            return esquerda, chave_esq  # abs(abs(x)) = abs(x)
+        return ({'tipo': 'operador', 'operador': op, 'esquerda': esquerda, 'direita': None},
+                ('op', op, chave_esq))
+
+    direita, chave_dir = _simplificar_no(no.get('direita') if no.get('direita') else None)
+    b = _constante(direita)
+    if a is not None and b is not None:
+        valor = _aplicar_operador(op, a, b)
+        return _folha_constante(valor), ('c', valor)
+
+    # Operadores sempre devolvem valores finitos; sensores podem valer inf
+    finito_esq = a is not None or esquerda['tipo'] == 'operador'
+    finito_dir = b is not None or direita['tipo'] == 'operador'
+    iguais = chave_esq == chave_dir
+
+    # Resultados não finitos (inf - inf, inf * 0, nan / x) viram 0 pela proteção
+    zero = ((op == '-' and iguais) or
+            (op == '*' and (a == 0 or b == 0)) or
+            (op == '/' and (a == 0 or (b is not None and abs(b) < 1e-6))))
+    if zero:
+        return _folha_constante(0.0), ('c', 0.0)
+    if op in ('max', 'min') and iguais and finito_esq:
+        return esquerda, chave_esq
+    if op in ('+', '-') and b == 0 and finito_esq:
+        return esquerda, chave_esq
+    if op == '+' and a == 0 and finito_dir:
+        return direita, chave_dir
+    if op in ('*', '/') and b == 1 and finito_esq:
+        return esquerda, chave_esq
+    if op == '*' and a == 1 and finito_dir:
+        return direita, chave_dir
+    if op == '+' and iguais and esquerda['tipo'] == 'operador':
+        # x + x = 2 * x exatamente, e a subárvore x passa a ser avaliada uma vez
+        esquerda, chave_esq = _folha_constante(2.0), ('c', 2.0)
+        op = '*'
+
+    if op in ('+', '*'):
+        chave = ('op', op) + tuple(sorted((chave_esq, chave_dir)))
+    else:
+        chave = ('op', op, chave_esq, chave_dir)
+    return {'tipo': 'operador', 'operador': op, 'esquerda': esquerda, 'direita': direita}, chave
+
+
+def simplificar_arvore(arvore):
+    """Simplificação algébrica com dobra de constantes, preservando a semântica protegida.
+
+    O resultado é igual ao da árvore original para quaisquer sensores (a menos
+    do sinal de zeros), com as regras: operadores com argumentos constantes
+    são pré-calculados; x - x, x * 0, 0 / x e x / 0 viram 0; max(x, x),
+    min(x, x), x + 0, x - 0, x * 1 e x / 1 viram x quando x é sempre finito;
+    abs(abs(x)) vira abs(x) e x + x vira 2 * x.
+    """
+    return _simplificar_no(arvore)[0]
+
+
+def contar_nos(arvore):
+    if arvore is None:
+        return 0
+    if arvore['tipo'] == 'folha':
+        return 1
+    return 1 + contar_nos(arvore['esquerda']) + contar_nos(arvore.get('direita'))
+
+
+class NoPG:
+    """Nó imutável e internado: nós iguais da mesma tabela são o mesmo objeto"""
+
+    __slots__ = ('indice', 'operador', 'valor', 'variavel', 'esquerda', 'direita')
+
+    def __init__(self, indice, operador=None, valor=None, variavel=None,
+                 esquerda=None, direita=None):
+        self.indice = indice
+        self.operador = operador
+        self.valor = valor
+        self.variavel = variavel
+        self.esquerda = esquerda
+        self.direita = direita
+
+    def __setattr__(self, nome, valor):
+        if hasattr(self, nome):
+            raise AttributeError("NoPG é imutável")
+        object.__setattr__(self, nome, valor)
+
+
+class TabelaSubarvores:
+    """Tabela de hash-consing de subárvores compartilhada pela população.
+
+    Cada subárvore distinta existe uma só vez como NoPG, e as funções
+    compiladas ficam em cache pelas raízes: indivíduos (ou árvores de
+    aceleração e rotação) iguais reaproveitam o mesmo código. Ao passar da
+    capacidade a tabela é esvaziada; nós já entregues continuam válidos,
+    apenas deixam de ser compartilhados com os novos.
+    """
+
+    def __init__(self, capacidade=200000):
+        self.capacidade = capacidade
+        self._nos = {}
+        self._funcoes = {}
+        self._contador = 0
+
+    def __len__(self):
+        return len(self._nos)
+
+    def limpar(self):
+        self._nos = {}
+        self._funcoes = {}
+
+    def internar(self, arvore):
+        """Devolve o NoPG canônico da árvore (formato de dicionários)"""
+        if len(self._nos) > self.capacidade:
+            self.limpar()
+        return self._internar(arvore)
+
+    def _novo(self, chave, **campos):
+        no = self._nos.get(chave)
+        if no is None:
+            self._contador += 1
+            no = NoPG(self._contador, **campos)
+            self._nos[chave] = no
+        return no
+
+    def _internar(self, no):
+        if no is None:
+            # Filho direito ausente em operador binário vale 0 em avaliar_no
+            return self._novo(('c', (0.0).hex()), valor=0.0)
+        if no['tipo'] == 'folha':
+            if 'valor' in no:
+                valor = float(no['valor'])
+                return self._novo(('c', valor.hex()), valor=valor)
+            return self._novo(('v', no['variavel']), variavel=no['variavel'])
+
+        op = no['operador']
+        esquerda = self._internar(no['esquerda'])
+        if op in OPERADORES_UNARIOS:
+            return self._novo((op, esquerda.indice), operador=op, esquerda=esquerda)
+        direita = self._internar(no.get('direita') if no.get('direita') else None)
+        if op in ('+', '*') and direita.indice < esquerda.indice:
+            # Comutativos (exatamente, em ponto flutuante): a + b e b + a são o mesmo nó
+            esquerda, direita = direita, esquerda
+        return self._novo((op, esquerda.indice, direita.indice),
+                          operador=op, esquerda=esquerda, direita=direita)
+
+    def compilar(self, raizes):
+        """Função sensores -> valor (ou tupla de valores), com subárvores comuns calculadas uma vez"""
+        raizes = tuple(raizes)
+        funcao = self._funcoes.get(raizes)
+        if funcao is None:
+            funcao = _compilar_raizes(raizes)
+            self._funcoes[raizes] = funcao
+        return funcao
+
+    def compilar_lote(self, raizes):
+        """Versão vetorizada de compilar: (sensores_em_arrays, n) -> array(s) de n valores"""
+        chave = ('lote',) + tuple(raizes)
+        funcao = self._funcoes.get(chave)
+        if funcao is None:
+            funcao = _compilar_raizes_lote(chave[1:])
+            self._funcoes[chave] = funcao
+        return funcao
+
+
+# Tabela compartilhada por todos os IndividuoPG do processo
+SUBARVORES = TabelaSubarvores()
+
+
+VARIAVEIS = ('dist_recurso', 'angulo_recurso', 'dist_meta', 'angulo_meta', 'dist_obstaculo',
+             'energia', 'velocidade', 'meta_atingida', 'recursos_restantes')
+
+# Códigos do genoma linear: 0..9 operadores, 10.. variáveis, negativos especiais
+OP_CONSTANTE = -1
+OP_VAZIO = -2  # Filho ausente (None no formato de dicionários)
+_CODIGO_OPERADOR = {op: codigo for codigo, op in enumerate(OPERADORES)}
+_CODIGO_VARIAVEL = {var: len(OPERADORES) + i for i, var in enumerate(VARIAVEIS)}
+_PRIMEIRO_UNARIO = _CODIGO_OPERADOR[OPERADORES_UNARIOS[0]]
+_PRIMEIRA_VARIAVEL = len(OPERADORES)
+
+
+class GenomaPG:
+    """Árvore em pré-ordem: opcodes, constantes e tamanho de cada subárvore.
+
+    A subárvore que começa na posição i ocupa [i, i + tamanhos[i]), então
+    copiar uma subárvore é fatiar três arrays. O formato de dicionários de
+    melhor_robo.json continua disponível via de_dict/para_dict.
+    """
+
+    __slots__ = ('ops', 'consts', 'tamanhos', 'raiz')
+
+    def __init__(self, ops, consts, tamanhos=None):
+        # Os arrays não são alterados depois de criados: o genoma pode ser
+        # compartilhado entre indivíduos (mutação e crossover criam genomas novos)
+        self.ops = ops
+        self.consts = consts
+        self.tamanhos = tamanhos if tamanhos is not None else _calcular_tamanhos(ops)
+        self.raiz = None  # NoPG da forma simplificada, preenchido por IndividuoPG.raiz
+
+    def __len__(self):
+        return len(self.ops)
+
+    @staticmethod
+    def vazio():
+        return array.array('b'), array.array('d'), array.array('i')
+
+    @classmethod
+    def de_dict(cls, arvore):
+        ops, consts, tamanhos = cls.vazio()
+
+        def visitar(no):
+            posicao = len(ops)
+            consts.append(0.0)
+            tamanhos.append(1)
+            if no is None:
+                ops.append(OP_VAZIO)
+            elif no['tipo'] == 'folha':
+                if 'valor' in no:
+                    ops.append(OP_CONSTANTE)
+                    consts[posicao] = no['valor']
+                elif no['variavel'] in _CODIGO_VARIAVEL:
+                    ops.append(_CODIGO_VARIAVEL[no['variavel']])
+                else:
+                    raise ValueError(f"Variável desconhecida: {no['variavel']}")
+            else:
+                ops.append(_CODIGO_OPERADOR[no['operador']])
+                visitar(no['esquerda'])
+                if no['operador'] not in OPERADORES_UNARIOS:
+                    visitar(no.get('direita'))
+                tamanhos[posicao] = len(ops) - posicao
+
+        visitar(arvore)
+        return cls(ops, consts, tamanhos)
+
+    def para_dict(self, posicao=0):
+        codigo = self.ops[posicao]
+        if codigo == OP_VAZIO:
+            return None
+        if codigo == OP_CONSTANTE:
+            return {'tipo': 'folha', 'valor': self.consts[posicao]}
+        if codigo >= _PRIMEIRA_VARIAVEL:
+            return {'tipo': 'folha', 'variavel': VARIAVEIS[codigo - _PRIMEIRA_VARIAVEL]}
+        esquerda = posicao + 1
+        direita = None
+        if codigo < _PRIMEIRO_UNARIO:
+            direita = self.para_dict(esquerda + self.tamanhos[esquerda])
+        return {'tipo': 'operador', 'operador': OPERADORES[codigo],
+                'esquerda': self.para_dict(esquerda), 'direita': direita}
+
+    def copiar_subarvore(self, posicao, saida):
+        fim = posicao + self.tamanhos[posicao]
+        saida[0].extend(self.ops[posicao:fim])
+        saida[1].extend(self.consts[posicao:fim])
+        saida[2].extend(self.tamanhos[posicao:fim])
+
+    def para_bytes(self):
+        return self.ops.tobytes(), self.consts.tobytes()
+
+    @classmethod
+    def de_bytes(cls, ops, consts):
+        return cls(array.array('b', ops), array.array('d', consts))
+
+
+def _genoma_ou_original(saida, *originais):
+    # Cópia sob escrita: se nada mudou, o genoma original é compartilhado
+    ops, consts, _ = saida
+    for genoma in originais:
+        if ops == genoma.ops and consts == genoma.consts:
+            return genoma
+    return GenomaPG(*saida)
+
+
+def _calcular_tamanhos(ops):
+    # Percorre a pré-ordem de trás para frente empilhando os tamanhos dos filhos
+    tamanhos = array.array('i', bytes(4 * len(ops)))
+    pilha = []
+    for posicao in range(len(ops) - 1, -1, -1):
+        codigo = ops[posicao]
+        if codigo < 0 or codigo >= _PRIMEIRA_VARIAVEL:
+            tamanho = 1
+        elif codigo >= _PRIMEIRO_UNARIO:
+            tamanho = 1 + pilha.pop()
+        else:
+            tamanho = 1 + pilha.pop() + pilha.pop()
+        tamanhos[posicao] = tamanho
+        pilha.append(tamanho)
+    return tamanhos
+
+
 class IndividuoPG:
     def __init__(self, profundidade=5):  # Aumentado de 3 para 5 para permitir árvores mais complexas
         self.profundidade = profundidade
-        self.arvore_aceleracao = self.criar_arvore(profundidade)
-        self.arvore_rotacao = self.criar_arvore(profundidade)
+        self._compiladas = {}  # Cache das árvores compiladas por tipo
+        self._hash = None  # Hash estrutural das duas árvores
+        # As árvores são guardadas como GenomaPG (arrays em pré-ordem)
+        self.genoma_aceleracao = self.criar_genoma(profundidade)
+        self.genoma_rotacao = self.criar_genoma(profundidade)
         self.fitness = 0
 
-    def criar_arvore(self, profundidade):
+    @classmethod
+    def de_genomas(cls, genoma_aceleracao, genoma_rotacao, profundidade=5):
+        # Não gera árvores aleatórias: elas seriam descartadas logo em seguida
+        individuo = cls.__new__(cls)
+        individuo.profundidade = profundidade
+        individuo._compiladas = {}
+        individuo._hash = None
+        individuo.genoma_aceleracao = genoma_aceleracao
+        individuo.genoma_rotacao = genoma_rotacao
+        individuo.fitness = 0
+        return individuo
+
+    # Formato de dicionários (o de melhor_robo.json), convertido sob demanda
+    @property
+    def arvore_aceleracao(self):
+        return self.genoma_aceleracao.para_dict()
+
+    @arvore_aceleracao.setter
+    def arvore_aceleracao(self, arvore):
+        self.genoma_aceleracao = GenomaPG.de_dict(arvore)
+        self.invalidar_compilacao()
+
+    @property
+    def arvore_rotacao(self):
+        return self.genoma_rotacao.para_dict()
+
+    @arvore_rotacao.setter
+    def arvore_rotacao(self, arvore):
+        self.genoma_rotacao = GenomaPG.de_dict(arvore)
+        self.invalidar_compilacao()
+
+    def criar_genoma(self, profundidade):
+        saida = GenomaPG.vazio()
+        self._emitir_arvore(profundidade, saida)
+        return GenomaPG(*saida)
+
+    def _emitir_arvore(self, profundidade, saida):
+        # Escreve uma árvore aleatória em pré-ordem no fim dos arrays de saida
         if profundidade == 0:
-            return self.criar_folha()
+            self._emitir_folha(saida)
+            return
 
         # Adicionados novos operadores matemáticos para melhorar a expressividade
         # sin e cos permitem movimentos mais suaves
         # log_safe ajuda a lidar com valores muito grandes
         operador = random.choice(['+', '-', '*', '/', 'max', 'min', 'abs', 'sin', 'cos', 'log_safe'])
-        if operador in ['abs', 'sin', 'cos', 'log_safe']:
-            return {
-                'tipo': 'operador',
-                'operador': operador,
-                'esquerda': self.criar_arvore(profundidade - 1),
-                'direita': None
-            }
-        else:
-            return {
-                'tipo': 'operador',
-                'operador': operador,
-                'esquerda': self.criar_arvore(profundidade - 1),
-                'direita': self.criar_arvore(profundidade - 1)
-            }
-
-    def criar_folha(self):
+        ops, consts, tamanhos = saida
+        posicao = len(ops)
+        ops.append(_CODIGO_OPERADOR[operador])
+        consts.append(0.0)
+        tamanhos.append(1)
+        self._emitir_arvore(profundidade - 1, saida)
+        if operador not in ['abs', 'sin', 'cos', 'log_safe']:
+            self._emitir_arvore(profundidade - 1, saida)
+        tamanhos[posicao] = len(ops) - posicao
+
+    def _emitir_folha(self, saida):
         # Ajustados os pesos para priorizar informações mais relevantes
         # Maior peso para dist_recurso e dist_obstaculo para melhor navegação
         # Menor peso para meta_atingida pois é um estado binário
@@ -610,13 +1865,111 @@ class IndividuoPG:
             k=1
         )[0]
         if terminal == 'constante':
-            return {'tipo': 'folha', 'valor': random.uniform(-5, 5)}
+            saida[0].append(OP_CONSTANTE)
+            saida[1].append(random.uniform(-5, 5))
         else:
-            return {'tipo': 'folha', 'variavel': terminal}
+            saida[0].append(_CODIGO_VARIAVEL[terminal])
+            saida[1].append(0.0)
+        saida[2].append(1)
 
     def avaliar(self, sensores, tipo='aceleracao'):
-        arvore = self.arvore_aceleracao if tipo == 'aceleracao' else self.arvore_rotacao
-        return self.avaliar_no(arvore, sensores)
+        # Usa a forma compilada da árvore; avaliar_no continua como referência
+        funcao = self._compiladas.get(tipo)
+        if funcao is None:
+            funcao = self.compilar(tipo)
+        return funcao(sensores)
+
+    def avaliar_par(self, sensores):
+        # (aceleracao, rotacao) numa só chamada; subárvores comuns às duas são calculadas uma vez
+        funcao = self._compiladas.get('par')
+        if funcao is None:
+            funcao = SUBARVORES.compilar((self.raiz('aceleracao'), self.raiz('rotacao')))
+            self._compiladas['par'] = funcao
+        return funcao(sensores)
+
+    def compilar(self, tipo='aceleracao'):
+        funcao = SUBARVORES.compilar((self.raiz(tipo),))
+        self._compiladas[tipo] = funcao
+        return funcao
+
+    def raiz(self, tipo='aceleracao'):
+        # Árvore simplificada e internada em SUBARVORES, guardada no próprio genoma:
+        # genomas compartilhados entre pais e filhos não são reprocessados
+        genoma = self.genoma_aceleracao if tipo == 'aceleracao' else self.genoma_rotacao
+        if genoma.raiz is None:
+            genoma.raiz = SUBARVORES.internar(self.arvore_simplificada(tipo))
+        return genoma.raiz
+
+    def avaliar_lote(self, sensores, tipo='aceleracao', n=None):
+        # Avalia a árvore para vários vetores de sensores de uma só vez.
+        # sensores: dict com um array por terminal (ex.: sensores['dist_recurso'][i])
+        if n is None:
+            n = max((np.size(valores) for valores in sensores.values()), default=1)
+        chave = ('lote', tipo)
+        funcao = self._compiladas.get(chave)
+        if funcao is None:
+            funcao = SUBARVORES.compilar_lote((self.raiz(tipo),))
+            self._compiladas[chave] = funcao
+        return funcao(sensores, n)
+
+    def saidas_sondas(self, sondas=None):
+        # Aceleração e rotação nas sondas, limitadas como na simulação (concatenadas)
+        saidas = self._compiladas.get('sondas') if sondas is None else None
+        if saidas is None:
+            usar_padrao = sondas is None
+            if usar_padrao:
+                sondas = SONDAS
+            n = len(sondas['energia'])
+            aceleracao = np.clip(self.avaliar_lote(sondas, 'aceleracao', n), -1, 1)
+            rotacao = np.clip(self.avaliar_lote(sondas, 'rotacao', n), -0.5, 0.5)
+            saidas = np.concatenate([aceleracao, rotacao])
+            if usar_padrao:
+                self._compiladas['sondas'] = saidas
+        return saidas
+
+    def impressao_comportamental(self, sondas=None, casas=4):
+        # Hash das saídas nas sondas arredondadas a casas decimais; indivíduos com
+        # a mesma impressão agem igual nesses vetores de sensores
+        chave = ('impressao', casas) if sondas is None else None
+        impressao = self._compiladas.get(chave)
+        if impressao is None:
+            valores = np.round(self.saidas_sondas(sondas), casas) + 0.0  # -0.0 -> 0.0
+            impressao = hashlib.blake2b(valores.tobytes(), digest_size=16).digest()
+            if chave is not None:
+                self._compiladas[chave] = impressao
+        return impressao
+
+    def arvore_simplificada(self, tipo='aceleracao'):
+        # O genoma não é alterado; só o código avaliado usa a forma simplificada
+        chave = ('simplificada', tipo)
+        arvore = self._compiladas.get(chave)
+        if arvore is None:
+            original = self.arvore_aceleracao if tipo == 'aceleracao' else self.arvore_rotacao
+            arvore = simplificar_arvore(original)
+            self._compiladas[chave] = arvore
+        return arvore
+
+    def contagem_nos(self):
+        # Número de nós de cada árvore antes e depois da simplificação
+        return {tipo: (len(genoma), contar_nos(self.arvore_simplificada(tipo)))
+                for tipo, genoma in (('aceleracao', self.genoma_aceleracao),
+                                     ('rotacao', self.genoma_rotacao))}
+
+    def invalidar_compilacao(self):
+        # Deve ser chamado sempre que as árvores forem alteradas
+        self._compiladas = {}
+        self._hash = None
+
+    def hash_estrutural(self):
+        # Identifica o genoma pelas duas árvores em forma canônica (pré-ordem)
+        if self._hash is None:
+            h = hashlib.blake2b(digest_size=16)
+            for genoma in (self.genoma_aceleracao, self.genoma_rotacao):
+                h.update(len(genoma).to_bytes(4, 'little'))
+                h.update(genoma.ops.tobytes())
+                h.update(genoma.consts.tobytes())
+            self._hash = h.digest()
+        return self._hash
 
     def avaliar_no(self, no, sensores):
         if no is None:
@@ -672,76 +2025,1473 @@ class IndividuoPG:
         return resultado
 
     def mutacao(self, probabilidade=0.4):  # Aumentada de 0.1 para 0.4 para maior exploração
-        self.arvore_aceleracao = self._mutacao_no(self.arvore_aceleracao, probabilidade)
-        self.arvore_rotacao = self._mutacao_no(self.arvore_rotacao, probabilidade)
-
-    def _mutacao_no(self, no, probabilidade):
-        if no is None:
-            return self.criar_arvore(2)  # Criar nova subárvore se o nó for nulo
-
-        if random.random() < probabilidade:
-            if no['tipo'] == 'folha':
-                return self.criar_folha()  # Mutação completa da folha
-            else:
-                return self.criar_arvore(2)  # Mutação completa do operador
+        anteriores = (self.genoma_aceleracao, self.genoma_rotacao)
+        self.genoma_aceleracao = self._mutacao_genoma(self.genoma_aceleracao, probabilidade)
+        self.genoma_rotacao = self._mutacao_genoma(self.genoma_rotacao, probabilidade)
+        if (self.genoma_aceleracao, self.genoma_rotacao) != anteriores:
+            self.invalidar_compilacao()
+
+    def _mutacao_genoma(self, genoma, probabilidade):
+        # Percorre a pré-ordem copiando os nós; subárvores sorteadas são substituídas
+        saida = GenomaPG.vazio()
+        ops, consts, tamanhos = saida
+
+        def visitar(posicao):
+            codigo = genoma.ops[posicao]
+            if codigo == OP_VAZIO:
+                self._emitir_arvore(2, saida)  # Criar nova subárvore se o nó for nulo
+                return
+
+            folha = codigo < 0 or codigo >= _PRIMEIRA_VARIAVEL
+            if random.random() < probabilidade:
+                if folha:
+                    self._emitir_folha(saida)  # Mutação completa da folha
+                else:
+                    self._emitir_arvore(2, saida)  # Mutação completa do operador
+                return
+
+            if folha:
+                genoma.copiar_subarvore(posicao, saida)
+                return
+            inicio = len(ops)
+            ops.append(codigo)
+            consts.append(0.0)
+            tamanhos.append(1)
+            esquerda = posicao + 1
+            visitar(esquerda)
+            if codigo < _PRIMEIRO_UNARIO:
+                direita = esquerda + genoma.tamanhos[esquerda]
+                if genoma.ops[direita] == OP_VAZIO:
+                    genoma.copiar_subarvore(direita, saida)
+                else:
+                    visitar(direita)
+            tamanhos[inicio] = len(ops) - inicio
 
-        if no['tipo'] == 'operador':
-            no['esquerda'] = self._mutacao_no(no.get('esquerda'), probabilidade)
-            if no.get('direita') is not None:
-                no['direita'] = self._mutacao_no(no.get('direita'), probabilidade)
-        return no
+        visitar(0)
+        return _genoma_ou_original(saida, genoma)
 
     def crossover(self, outro):
-        # Implementação de crossover mais robusta com cópia profunda
-        filho = IndividuoPG(self.profundidade)
-        filho.arvore_aceleracao = self._crossover_no(self.arvore_aceleracao, outro.arvore_aceleracao)
-        filho.arvore_rotacao = self._crossover_no(self.arvore_rotacao, outro.arvore_rotacao)
-        return filho
-
-    def _crossover_no(self, no1, no2):
-        if no1 is None:
-            return json.loads(json.dumps(no2))  # Cópia profunda usando JSON
-        if no2 is None:
-            return json.loads(json.dumps(no1))
-
-        if no1['tipo'] == 'folha' or no2['tipo'] == 'folha':
-            return json.loads(json.dumps(random.choice([no1, no2])))
-
-        # Preserva a estrutura da árvore quando os operadores são iguais
-        if no1['operador'] == no2['operador']:
-            return {
-                'tipo': 'operador',
-                'operador': no1['operador'],
-                'esquerda': self._crossover_no(no1.get('esquerda'), no2.get('esquerda')),
-                'direita': self._crossover_no(no1.get('direita'), no2.get('direita'))
-            }
-
-        return json.loads(json.dumps(random.choice([no1, no2])))
-
-    def salvar(self, arquivo):
+        # Crossover sobre os genomas lineares: subárvores são copiadas por fatiamento
+        filho_aceleracao = self._crossover_genoma(self.genoma_aceleracao, outro.genoma_aceleracao)
+        filho_rotacao = self._crossover_genoma(self.genoma_rotacao, outro.genoma_rotacao)
+        return IndividuoPG.de_genomas(filho_aceleracao, filho_rotacao, self.profundidade)
+
+    def _crossover_genoma(self, genoma1, genoma2):
+        saida = GenomaPG.vazio()
+        ops, consts, tamanhos = saida
+
+        def cruzar(posicao1, posicao2):
+            codigo1 = genoma1.ops[posicao1]
+            codigo2 = genoma2.ops[posicao2]
+            if codigo1 == OP_VAZIO:
+                genoma2.copiar_subarvore(posicao2, saida)
+                return
+            if codigo2 == OP_VAZIO:
+                genoma1.copiar_subarvore(posicao1, saida)
+                return
+
+            folha = (codigo1 < 0 or codigo1 >= _PRIMEIRA_VARIAVEL or
+                     codigo2 < 0 or codigo2 >= _PRIMEIRA_VARIAVEL)
+            # Preserva a estrutura da árvore quando os operadores são iguais
+            if folha or codigo1 != codigo2:
+                if random.choice([0, 1]) == 0:
+                    genoma1.copiar_subarvore(posicao1, saida)
+                else:
+                    genoma2.copiar_subarvore(posicao2, saida)
+                return
+
+            inicio = len(ops)
+            ops.append(codigo1)
+            consts.append(0.0)
+            tamanhos.append(1)
+            esquerda1, esquerda2 = posicao1 + 1, posicao2 + 1
+            cruzar(esquerda1, esquerda2)
+            if codigo1 < _PRIMEIRO_UNARIO:
+                cruzar(esquerda1 + genoma1.tamanhos[esquerda1],
+                       esquerda2 + genoma2.tamanhos[esquerda2])
+            tamanhos[inicio] = len(ops) - inicio
+
+        cruzar(0, 0)
+        return _genoma_ou_original(saida, genoma1, genoma2)
+
+    def salvar(self, arquivo, simplificar=False):
+        if simplificar:
+            arvores = (self.arvore_simplificada('aceleracao'), self.arvore_simplificada('rotacao'))
+        else:
+            arvores = (self.arvore_aceleracao, self.arvore_rotacao)
         with open(arquivo, 'w') as f:
             json.dump({
-                'arvore_aceleracao': self.arvore_aceleracao,
-                'arvore_rotacao': self.arvore_rotacao
+                'arvore_aceleracao': arvores[0],
+                'arvore_rotacao': arvores[1]
             }, f)
 
     @classmethod
     def carregar(cls, arquivo):
         with open(arquivo, 'r') as f:
             dados = json.load(f)
-        individuo = cls()
-        individuo.arvore_aceleracao = dados['arvore_aceleracao']
-        individuo.arvore_rotacao = dados['arvore_rotacao']
-        return individuo
+        return cls.de_genomas(GenomaPG.de_dict(dados['arvore_aceleracao']),
+                              GenomaPG.de_dict(dados['arvore_rotacao']))
+
+    def serializar(self):
+        # Forma compacta (bytes dos arrays do genoma) para enviar o indivíduo a outros processos
+        return self.genoma_aceleracao.para_bytes() + self.genoma_rotacao.para_bytes()
+
+    @classmethod
+    def desserializar(cls, dados, profundidade=5):
+        return cls.de_genomas(GenomaPG.de_bytes(dados[0], dados[1]),
+                              GenomaPG.de_bytes(dados[2], dados[3]), profundidade)
+
+
+def gerar_sondas(n=64, semente=0):
+    """Vetores de sensores fixos (um array por terminal) para impressao_comportamental"""
+    rng = np.random.default_rng(semente)
+    restantes = rng.integers(0, 6, n)
+    return {
+        'dist_recurso': np.where(restantes == 0, np.inf, rng.uniform(0, 1000, n)),
+        'angulo_recurso': rng.uniform(-np.pi, np.pi, n),
+        'dist_meta': rng.uniform(0, 1000, n),
+        'angulo_meta': rng.uniform(-np.pi, np.pi, n),
+        'dist_obstaculo': rng.uniform(0, 800, n),
+        'energia': rng.uniform(0, 100, n),
+        'velocidade': rng.uniform(0.1, 5, n),
+        'meta_atingida': rng.random(n) < 0.2,
+        'recursos_restantes': restantes,
+    }
+
+
+SONDAS = gerar_sondas()
+
+
+def derivar_semente(*partes):
+    """Deriva uma semente estável (independente de processo) a partir de uma tupla"""
+    return random.Random(repr(partes)).getrandbits(64)
+
+
+@contextlib.contextmanager
+def fluxo_aleatorio(semente=None, estado=None):
+    """Executa o bloco com o random global semeado ou no estado dado, restaurando o anterior"""
+    anterior = random.getstate()
+    if estado is not None:
+        random.setstate(estado)
+    else:
+        random.seed(semente)
+    try:
+        yield
+    finally:
+        random.setstate(anterior)
+
+
+def _quadrado(valores):
+    # x**2 em escalares usa pow() da libm, que nem sempre coincide com x*x (usado
+    # por arrays**2); float_power reproduz o resultado escalar bit a bit
+    return np.float_power(valores, 2.0)
+
+
+def _normalizar_angulos(angulos):
+    # Mesmos laços de Robo.get_sensores, aplicados ao array inteiro
+    while True:
+        fora = angulos > np.pi
+        if not fora.any():
+            break
+        angulos[fora] -= 2 * np.pi
+    while True:
+        fora = angulos < -np.pi
+        if not fora.any():
+            break
+        angulos[fora] += 2 * np.pi
+    return angulos
+
+
+class Instrumentacao:
+    """Contadores e cronômetros por fase, gravados como uma linha JSON por geração.
+
+    Opcional: só é consultada quando ativa (ver ProgramacaoGenetica.evoluir),
+    e os laços de simulação usam versões sem medição quando está desligada.
+    As fases por passo (sensores, árvores, física) só são medidas nas
+    avaliações feitas no próprio processo; com workers aparecem apenas as
+    fases do coordenador. memoria=True acrescenta o pico do tracemalloc e as
+    linhas que mais alocaram.
+    """
+
+    FASES = ('ambientes', 'avaliacao', 'sensores', 'arvores', 'fisica',
+             'selecao', 'reproducao', 'migracao', 'diversidade', 'checkpoint')
+    CONTADORES = ('passos', 'episodios', 'fim_energia', 'fim_tempo')
+
+    def __init__(self, arquivo=None, memoria=False, linhas_memoria=5):
+        self.arquivo = arquivo
+        self.memoria = memoria
+        self.linhas_memoria = linhas_memoria
+        self.registros = []
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.fases = dict.fromkeys(self.FASES, 0.0)
+        self.contadores = collections.Counter(dict.fromkeys(self.CONTADORES, 0))
+        self.nos = {}
+        self._inicio = time.perf_counter()
+
+    def iniciar(self):
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._reiniciar()
+
+    def encerrar(self):
+        if self.memoria and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def medir(self, fase):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[fase] += time.perf_counter() - inicio
+
+    def registrar_nos(self, populacoes):
+        # Tamanho médio dos genomas e das árvores simplificadas que são avaliadas
+        individuos = [individuo for ilha in populacoes for individuo in ilha]
+        genoma = simplificado = 0
+        for individuo in individuos:
+            for antes, depois in individuo.contagem_nos().values():
+                genoma += antes
+                simplificado += depois
+        n = max(1, 2 * len(individuos))
+        self.nos = {'genoma_medio': genoma / n, 'simplificado_medio': simplificado / n}
+
+    def finalizar_geracao(self, geracao, melhor_fitness):
+        registro = {
+            'geracao': geracao,
+            'segundos': time.perf_counter() - self._inicio,
+            'melhor_fitness': float(melhor_fitness),
+            'fases': self.fases,
+            'contadores': dict(self.contadores),
+            'nos': self.nos,
+        }
+        if self.memoria and tracemalloc.is_tracing():
+            atual, pico = tracemalloc.get_traced_memory()
+            topo = tracemalloc.take_snapshot().statistics('lineno')[:self.linhas_memoria]
+            registro['memoria'] = {
+                'atual': atual,
+                'pico': pico,
+                'topo': [f"{estatistica.traceback[0].filename}:{estatistica.traceback[0].lineno} "
+                         f"{estatistica.size}" for estatistica in topo],
+            }
+            tracemalloc.reset_peak()
+        self.registros.append(registro)
+        if self.arquivo is not None:
+            with open(self.arquivo, 'a') as f:
+                f.write(json.dumps(registro) + "\n")
+        self._reiniciar()
+        return registro
+
+
+# Instrumentação da execução em andamento (None quando desligada)
+_instrumentacao_ativa = None
+
+
+def _medir(fase):
+    if _instrumentacao_ativa is None:
+        return contextlib.nullcontext()
+    return _instrumentacao_ativa.medir(fase)
+
+
+class TelemetriaEvolucao:
+    """Estatísticas da população gravadas em streaming, uma linha JSON por geração.
+
+    A cada geração são anexados ao arquivo: mínimo, média, mediana e máximo
+    do fitness por ilha, quantis do fitness da população, distribuição do
+    tamanho dos genomas, eventos de migração e colisões, recursos e metas
+    dos episódios simulados no próprio processo (avaliações vindas do cache
+    ou de workers não entram). Em memória ficam só os acumuladores da
+    geração em curso e alguns totais da execução; o histórico completo fica
+    apenas no arquivo, que painel_telemetria.py acompanha durante a execução.
+    """
+
+    QUANTIS = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.geracoes = 0
+        self.melhor_fitness = float('-inf')
+        self.episodios_total = 0
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.populacao = {}
+        self.episodios = dict.fromkeys(('simulados', 'colisoes', 'recursos', 'metas'), 0)
+        self.migracoes = []
+
+    def iniciar(self):
+        self._reiniciar()
+
+    def encerrar(self):
+        pass
+
+    def registrar_episodios(self, colisoes, recursos, metas, n=1):
+        self.episodios['simulados'] += int(n)
+        self.episodios['colisoes'] += int(colisoes)
+        self.episodios['recursos'] += int(recursos)
+        self.episodios['metas'] += int(metas)
+
+    def registrar_populacoes(self, populacoes):
+        ilhas = []
+        for ilha in populacoes:
+            fitness = np.array([individuo.fitness for individuo in ilha], dtype=float)
+            ilhas.append({'min': float(fitness.min()), 'media': float(fitness.mean()),
+                          'mediana': float(np.median(fitness)), 'max': float(fitness.max())})
+        fitness = np.array([individuo.fitness for ilha in populacoes for individuo in ilha],
+                           dtype=float)
+        tamanhos = np.array([len(individuo.genoma_aceleracao) + len(individuo.genoma_rotacao)
+                             for ilha in populacoes for individuo in ilha])
+        self.populacao = {
+            'ilhas': ilhas,
+            'quantis_fitness': {f"p{round(q * 100)}": float(v)
+                                for q, v in zip(self.QUANTIS, np.quantile(fitness, self.QUANTIS))},
+            'tamanho_genomas': {'min': int(tamanhos.min()), 'media': float(tamanhos.mean()),
+                                'mediana': float(np.median(tamanhos)),
+                                'max': int(tamanhos.max())},
+        }
+
+    def registrar_migracoes(self, eventos):
+        self.migracoes.extend(eventos)
+
+    def finalizar_geracao(self, geracao, melhor_fitness):
+        simulados = self.episodios['simulados']
+        episodios = dict(self.episodios)
+        for campo in ('colisoes', 'recursos', 'metas'):
+            episodios[f"{campo}_por_episodio"] = episodios[campo] / simulados if simulados else None
+        registro = {
+            'geracao': geracao,
+            'instante': time.time(),
+            'melhor_fitness': float(melhor_fitness),
+            **self.populacao,
+            'episodios': episodios,
+            'migracoes': self.migracoes,
+        }
+        with open(self.arquivo, 'a') as f:
+            f.write(json.dumps(registro) + "\n")
+        self.geracoes += 1
+        self.melhor_fitness = max(self.melhor_fitness, float(melhor_fitness))
+        self.episodios_total += simulados
+        self._reiniciar()
+        return registro
+
+
+# Telemetria da execução em andamento (None quando desligada)
+_telemetria_ativa = None
+
+
+class MotorLote:
+    """Simula N indivíduos x K episódios em passo sincronizado usando arrays NumPy.
+
+    Cada episódio é uma tupla (ambiente, x_inicial, y_inicial, estado_rng), onde
+    estado_rng é o estado do random global no início do episódio. Cada par
+    (indivíduo, episódio) ocupa uma "pista" com seu próprio random.Random, de
+    modo que a física, os sorteios de Robo.mover e o fitness são idênticos aos
+    de Robo/Ambiente executados com o mesmo estado de random.
+    """
+
+    def __init__(self, episodios, raio=15, max_tempo=None, limiar_lote=16):
+        self.episodios = list(episodios)
+        self.raio = raio
+        self.max_tempo = max_tempo
+        # Com poucas pistas por árvore a avaliação escalar compilada é mais
+        # barata que a vetorizada (que tem custo fixo por chamada)
+        self.limiar_lote = limiar_lote
+
+    def _preparar_pistas(self, n_individuos):
+        k = len(self.episodios)
+        ambientes = [ep[0] for ep in self.episodios]
+        max_obs = max(1, max(len(a.obstaculos) for a in ambientes))
+        max_rec = max(1, max(len(a.recursos) for a in ambientes))
+
+        # Geometria estática por episódio (obstáculos inválidos nunca colidem)
+        ox = np.full((k, max_obs), np.inf)
+        ox2 = np.full((k, max_obs), -np.inf)
+        oy = np.full((k, max_obs), np.inf)
+        oy2 = np.full((k, max_obs), -np.inf)
+        cx = np.full((k, max_obs), np.inf)
+        cy = np.full((k, max_obs), np.inf)
+        rx = np.zeros((k, max_rec))
+        ry = np.zeros((k, max_rec))
+        rec_valido = np.zeros((k, max_rec), dtype=bool)
+        for e, amb in enumerate(ambientes):
+            for j, obs in enumerate(amb.obstaculos):
+                ox[e, j] = obs['x']
+                ox2[e, j] = obs['x'] + obs['largura']
+                oy[e, j] = obs['y']
+                oy2[e, j] = obs['y'] + obs['altura']
+                cx[e, j] = obs['x'] + obs['largura'] / 2
+                cy[e, j] = obs['y'] + obs['altura'] / 2
+            for j, rec in enumerate(amb.recursos):
+                rx[e, j] = rec['x']
+                ry[e, j] = rec['y']
+                rec_valido[e, j] = True
+
+        # Pista l = indivíduo * k + episódio
+        ep = np.tile(np.arange(k), n_individuos)
+        self.ox, self.ox2, self.oy, self.oy2 = ox[ep], ox2[ep], oy[ep], oy2[ep]
+        self.cx, self.cy = cx[ep], cy[ep]
+        self.rx, self.ry = rx[ep], ry[ep]
+        self.largura = np.array([a.largura for a in ambientes], dtype=float)[ep]
+        self.altura = np.array([a.altura for a in ambientes], dtype=float)[ep]
+        self.mx = np.array([a.meta['x'] for a in ambientes], dtype=float)[ep]
+        self.my = np.array([a.meta['y'] for a in ambientes], dtype=float)[ep]
+        self.mr = np.array([a.meta['raio'] for a in ambientes], dtype=float)[ep]
+        self.limite_tempo = np.array(
+            [self.max_tempo or a.max_tempo for a in ambientes])[ep]
+
+        n = n_individuos * k
+        self.x = np.array([float(e[1]) for e in self.episodios])[ep]
+        self.y = np.array([float(e[2]) for e in self.episodios])[ep]
+        self.ux = self.x.copy()
+        self.uy = self.y.copy()
+        self.angulo = np.zeros(n)
+        self.velocidade = np.zeros(n)
+        self.energia = np.full(n, 100.0)
+        self.recursos_coletados = np.zeros(n, dtype=np.int64)
+        self.colisoes = np.zeros(n, dtype=np.int64)
+        self.distancia_percorrida = np.zeros(n)
+        self.tempo_parado = np.zeros(n, dtype=np.int64)
+        self.meta_atingida = np.zeros(n, dtype=bool)
+        # Recursos inválidos (preenchimento) contam como já coletados
+        self.coletado = ~rec_valido[ep]
+        self.tempo = np.zeros(n, dtype=np.int64)
+        self.ativo = np.ones(n, dtype=bool)
+
+        self.rngs = []
+        for _ in range(n_individuos):
+            for episodio in self.episodios:
+                rng = random.Random()
+                rng.setstate(episodio[3])
+                self.rngs.append(rng)
+
+    def _sensores(self, idx):
+        x, y, angulo = self.x[idx], self.y[idx], self.angulo[idx]
+        pendente = ~self.coletado[idx]
+
+        dist_rec = np.sqrt(_quadrado(x[:, None] - self.rx[idx]) +
+                           _quadrado(y[:, None] - self.ry[idx]))
+        dist_recurso = np.where(pendente, dist_rec, np.inf).min(axis=1)
+
+        dist_obs = np.sqrt(_quadrado(x[:, None] - self.cx[idx]) +
+                           _quadrado(y[:, None] - self.cy[idx]))
+        dist_obstaculo = dist_obs.min(axis=1)
+
+        dist_meta = np.sqrt(_quadrado(x - self.mx[idx]) + _quadrado(y - self.my[idx]))
+
+        # Ângulo até o primeiro recurso não coletado (mesma regra de get_sensores)
+        tem_recurso = pendente.any(axis=1)
+        primeiro = pendente.argmax(axis=1)
+        linhas = np.arange(len(idx))
+        dx = self.rx[idx][linhas, primeiro] - x
+        dy = self.ry[idx][linhas, primeiro] - y
+        angulo_recurso = np.where(tem_recurso, np.arctan2(dy, dx) - angulo, 0.0)
+        angulo_recurso = _normalizar_angulos(angulo_recurso)
+
+        angulo_meta = _normalizar_angulos(
+            np.arctan2(self.my[idx] - y, self.mx[idx] - x) - angulo)
+
+        return {
+            'dist_recurso': dist_recurso,
+            'dist_obstaculo': dist_obstaculo,
+            'dist_meta': dist_meta,
+            'angulo_recurso': angulo_recurso,
+            'angulo_meta': angulo_meta,
+            'energia': self.energia[idx],
+            'velocidade': self.velocidade[idx],
+            'meta_atingida': self.meta_atingida[idx],
+            'recursos_restantes': pendente.sum(axis=1)
+        }
+
+    def _acoes(self, individuos, idx, sensores):
+        k = len(self.episodios)
+        n = len(idx)
+        aceleracao = np.empty(n)
+        rotacao = np.empty(n)
+        dono = idx // k
+
+        # Pistas agrupadas pela raiz internada de cada árvore: indivíduos com a
+        # mesma árvore (após simplificação) são avaliados numa única chamada
+        escalar = []
+        for coluna, saida in ((0, aceleracao), (1, rotacao)):
+            raizes = self._raizes[coluna]
+            id_pista = self._ids_raizes[coluna][dono]
+            ordem = np.argsort(id_pista, kind='stable')
+            ordenado = id_pista[ordem]
+            inicios = np.flatnonzero(np.r_[True, ordenado[1:] != ordenado[:-1]])
+            fins = np.r_[inicios[1:], n]
+            pequeno = np.zeros(n, dtype=bool)
+            for ini, fim in zip(inicios.tolist(), fins.tolist()):
+                pistas = ordem[ini:fim]
+                if fim - ini >= self.limiar_lote:
+                    raiz = raizes[dono[pistas[0]]]
+                    fatia = {nome: valores[pistas] for nome, valores in sensores.items()}
+                    saida[pistas] = SUBARVORES.compilar_lote((raiz,))(fatia, fim - ini)
+                else:
+                    pequeno[pistas] = True
+            escalar.append(pequeno)
+
+        # Com poucas pistas a avaliação escalar compilada é mais barata
+        if escalar[0].any() or escalar[1].any():
+            nomes = list(sensores)
+            colunas = [sensores[nome].tolist() for nome in nomes]
+            listas = [dict(zip(nomes, valores)) for valores in zip(*colunas)]
+            for j in np.flatnonzero(escalar[0] | escalar[1]).tolist():
+                individuo = individuos[dono[j]]
+                if escalar[0][j] and escalar[1][j]:
+                    aceleracao[j], rotacao[j] = individuo.avaliar_par(listas[j])
+                elif escalar[0][j]:
+                    aceleracao[j] = individuo.avaliar(listas[j], 'aceleracao')
+                else:
+                    rotacao[j] = individuo.avaliar(listas[j], 'rotacao')
+
+        # Mesmo limite de avaliar_individuo: max(-1, min(1, a)), inclusive para NaN
+        aceleracao = np.where(aceleracao < 1, aceleracao, 1.0)
+        aceleracao = np.where(aceleracao > -1, aceleracao, -1.0)
+        rotacao = np.where(rotacao < 0.5, rotacao, 0.5)
+        rotacao = np.where(rotacao > -0.5, rotacao, -0.5)
+        return aceleracao, rotacao
+
+    def _mover(self, idx, aceleracao, rotacao):
+        raio = self.raio
+        angulo = self.angulo[idx] + rotacao
+        x, y = self.x[idx], self.y[idx]
+
+        # Robô parado: força aceleração mínima e rotação aleatória
+        parado = np.sqrt(_quadrado(x - self.ux[idx]) + _quadrado(y - self.uy[idx])) < 0.1
+        tempo_parado = np.where(parado, self.tempo_parado[idx] + 1, 0)
+        forcar = parado & (tempo_parado > 5)
+        if forcar.any():
+            aceleracao = np.where(forcar & ~(aceleracao > 0.2), 0.2, aceleracao)
+            pistas = idx[forcar].tolist()
+            rotacao = rotacao.copy()
+            rotacao[forcar] = [self.rngs[p].uniform(-0.2, 0.2) for p in pistas]
+        self.tempo_parado[idx] = tempo_parado
+
+        velocidade = self.velocidade[idx] + aceleracao
+        velocidade = np.where(velocidade < 5, velocidade, 5.0)
+        velocidade = np.where(velocidade > 0.1, velocidade, 0.1)
+
+        novo_x = x + velocidade * np.cos(angulo)
+        novo_y = y + velocidade * np.sin(angulo)
+
+        colisao = ((novo_x - raio < 0) | (novo_x + raio > self.largura[idx]) |
+                   (novo_y - raio < 0) | (novo_y + raio > self.altura[idx]))
+        colisao |= ((novo_x[:, None] + raio > self.ox[idx]) &
+                    (novo_x[:, None] - raio < self.ox2[idx]) &
+                    (novo_y[:, None] + raio > self.oy[idx]) &
+                    (novo_y[:, None] - raio < self.oy2[idx])).any(axis=1)
+
+        if colisao.any():
+            pistas = idx[colisao].tolist()
+            angulo[colisao] += [self.rngs[p].uniform(-np.pi/4, np.pi/4) for p in pistas]
+            self.colisoes[idx[colisao]] += 1
+        velocidade = np.where(colisao, 0.1, velocidade)
+        livre = ~colisao
+        self.distancia_percorrida[idx[livre]] += np.sqrt(
+            _quadrado(novo_x[livre] - x[livre]) + _quadrado(novo_y[livre] - y[livre]))
+        x = np.where(colisao, x, novo_x)
+        y = np.where(colisao, y, novo_y)
+
+        self.x[idx] = x
+        self.y[idx] = y
+        self.ux[idx] = x
+        self.uy[idx] = y
+        self.angulo[idx] = angulo
+        self.velocidade[idx] = velocidade
+
+        # Coleta de recursos
+        coletado = self.coletado[idx]
+        dist = np.sqrt(_quadrado(x[:, None] - self.rx[idx]) +
+                       _quadrado(y[:, None] - self.ry[idx]))
+        novos = ~coletado & (dist < raio + 10)
+        self.coletado[idx] = coletado | novos
+        n_novos = novos.sum(axis=1)
+        self.recursos_coletados[idx] += n_novos
+
+        # Meta: recupera energia uma única vez
+        energia = self.energia[idx]
+        meta = self.meta_atingida[idx]
+        atingiu = ~meta & (np.sqrt(_quadrado(x - self.mx[idx]) + _quadrado(y - self.my[idx])) <
+                           raio + self.mr[idx])
+        energia = np.where(atingiu, np.where(energia + 50 < 100, energia + 50, 100.0), energia)
+        self.meta_atingida[idx] = meta | atingiu
+
+        energia = energia - (0.1 + 0.05 * velocidade + 0.1 * np.abs(rotacao))
+        energia = np.where(energia > 0, energia, 0.0)
+        recarga = energia + 20 * n_novos
+        energia = np.where(n_novos > 0, np.where(recarga < 100, recarga, 100.0), energia)
+        self.energia[idx] = energia
+        return energia <= 0
+
+    def avaliar(self, individuos):
+        """Executa todos os episódios de todos os indivíduos e devolve o fitness médio"""
+        global _passos_simulados
+        individuos = list(individuos)
+        k = len(self.episodios)
+        self._preparar_pistas(len(individuos))
+        self._raizes = ([ind.raiz('aceleracao') for ind in individuos],
+                        [ind.raiz('rotacao') for ind in individuos])
+        self._ids_raizes = tuple(np.array([raiz.indice for raiz in raizes], dtype=np.int64)
+                                 for raizes in self._raizes)
+        self.passos_executados = 0
+
+        medidor = _instrumentacao_ativa
+        relogio = time.perf_counter
+        while self.ativo.any():
+            t0 = relogio()
+            idx = np.flatnonzero(self.ativo)
+            sensores = self._sensores(idx)
+            t1 = relogio()
+            aceleracao, rotacao = self._acoes(individuos, idx, sensores)
+            t2 = relogio()
+            sem_energia = self._mover(idx, aceleracao, rotacao)
+            if medidor is not None:
+                medidor.fases['sensores'] += t1 - t0
+                medidor.fases['arvores'] += t2 - t1
+                medidor.fases['fisica'] += relogio() - t2
+            # Como em simular_episodio, passo() não é chamado quando a energia acaba
+            self.tempo[idx] += ~sem_energia
+            fim = sem_energia | (self.tempo[idx] >= self.limite_tempo[idx])
+            self.ativo[idx[fim]] = False
+            self.passos_executados += len(idx)
+        _passos_simulados += int(self.passos_executados)
+
+        if medidor is not None:
+            fim_energia = int((self.energia <= 0).sum())
+            medidor.contadores['passos'] += self.passos_executados
+            medidor.contadores['episodios'] += len(self.energia)
+            medidor.contadores['fim_energia'] += fim_energia
+            medidor.contadores['fim_tempo'] += len(self.energia) - fim_energia
+
+        if _telemetria_ativa is not None:
+            _telemetria_ativa.registrar_episodios(self.colisoes.sum(), self.recursos_coletados.sum(),
+                                                  self.meta_atingida.sum(), len(self.energia))
+
+        restantes = (~self.coletado).sum(axis=1)
+        fitness_episodio = (
+            self.recursos_coletados * 5000.0 +
+            np.where(self.meta_atingida & (restantes == 0), 8000.0, 0.0) +
+            self.energia * 5 +
+            self.distancia_percorrida * 0.2 -
+            self.colisoes * 3000.0 -
+            restantes * 6000.0
+        )
+        fitness_episodio = np.where(self.meta_atingida & (restantes > 0),
+                                    fitness_episodio - 10000, fitness_episodio)
+        fitness_episodio = np.where(fitness_episodio > 1, fitness_episodio, 1.0)
+        fitness_episodio = fitness_episodio.reshape(len(individuos), k)
+
+        fitness = np.zeros(len(individuos))
+        for e in range(k):
+            fitness = fitness + fitness_episodio[:, e]
+        return fitness / k
+
+
+# Passos de simulação executados neste processo (os workers devolvem os seus)
+_passos_simulados = 0
+
+
+def simular_episodio(individuo, ambiente, robo, max_tempo=None, trajetoria=None):
+    """Executa um episódio do robô controlado pelo indivíduo e devolve seu fitness"""
+    global _passos_simulados
+    if _instrumentacao_ativa is not None:
+        return _simular_episodio_instrumentado(individuo, ambiente, robo, max_tempo, trajetoria)
+    # max_tempo encurta o episódio (avaliação de baixa fidelidade)
+    limite = max_tempo or ambiente.max_tempo
+    inicio = ambiente.tempo
+    if trajetoria is not None:
+        trajetoria.registrar(robo, ambiente)
+    while True:
+        sensores = robo.get_sensores(ambiente)
+        estado = ambiente.get_estado()
+        sensores['recursos_restantes'] = estado['recursos_restantes']
+
+        aceleracao, rotacao = individuo.avaliar_par(sensores)
+
+        aceleracao = max(-1, min(1, aceleracao))
+        rotacao = max(-0.5, min(0.5, rotacao))
+
+        sem_energia = robo.mover(aceleracao, rotacao, ambiente)
+
+        fim = sem_energia or ambiente.passo() or ambiente.tempo >= limite
+        if trajetoria is not None:
+            trajetoria.registrar(robo, ambiente, aceleracao, rotacao)
+        if fim:
+            break
+
+    # passo() não é chamado no passo em que a energia acaba
+    _passos_simulados += ambiente.tempo - inicio + bool(sem_energia)
+    return _fitness_episodio(robo, ambiente)
+
+
+def _simular_episodio_instrumentado(individuo, ambiente, robo, max_tempo, trajetoria):
+    # Mesmo laço de simular_episodio, cronometrando sensores, árvores e física
+    global _passos_simulados
+    medidor = _instrumentacao_ativa
+    relogio = time.perf_counter
+    fases = medidor.fases
+    limite = max_tempo or ambiente.max_tempo
+    if trajetoria is not None:
+        trajetoria.registrar(robo, ambiente)
+    passos = 0
+    while True:
+        t0 = relogio()
+        sensores = robo.get_sensores(ambiente)
+        estado = ambiente.get_estado()
+        sensores['recursos_restantes'] = estado['recursos_restantes']
+        t1 = relogio()
+
+        aceleracao, rotacao = individuo.avaliar_par(sensores)
+        t2 = relogio()
+
+        aceleracao = max(-1, min(1, aceleracao))
+        rotacao = max(-0.5, min(0.5, rotacao))
+
+        sem_energia = robo.mover(aceleracao, rotacao, ambiente)
+
+        fim = sem_energia or ambiente.passo() or ambiente.tempo >= limite
+        fases['sensores'] += t1 - t0
+        fases['arvores'] += t2 - t1
+        fases['fisica'] += relogio() - t2
+        passos += 1
+        if trajetoria is not None:
+            trajetoria.registrar(robo, ambiente, aceleracao, rotacao)
+        if fim:
+            break
+
+    _passos_simulados += passos
+    medidor.contadores['passos'] += passos
+    medidor.contadores['episodios'] += 1
+    medidor.contadores['fim_energia' if sem_energia else 'fim_tempo'] += 1
+    return _fitness_episodio(robo, ambiente)
+
+
+def _fitness_episodio(robo, ambiente):
+    estado = ambiente.get_estado()
+    if _telemetria_ativa is not None:
+        _telemetria_ativa.registrar_episodios(robo.colisoes, robo.recursos_coletados,
+                                              robo.meta_atingida)
+
+    fitness_tentativa = (
+        robo.recursos_coletados * 5000 +
+        (8000 if (robo.meta_atingida and estado['recursos_restantes'] == 0) else 0) +
+        robo.energia * 5 +
+        robo.distancia_percorrida * 0.2 -
+        robo.colisoes * 3000 -
+        estado['recursos_restantes'] * 6000
+    )
+
+    if robo.meta_atingida and estado['recursos_restantes'] > 0:
+        fitness_tentativa -= 10000
+
+    return max(1, fitness_tentativa)
+
+
+def construir_episodios(entradas, tamanho_celula=None):
+    """Materializa as entradas (semente_mapa, sementes_episodios) de um banco de ambientes.
+
+    Devolve tuplas (ambiente, x_inicial, y_inicial, estado_rng), o formato
+    aceito por avaliar_em_episodios e por MotorLote. Com tamanho_celula, cada
+    ambiente ganha uma GradeObstaculos e um IndiceRecursos.
+    """
+    episodios = []
+    for semente_mapa, sementes_episodios in entradas:
+        with fluxo_aleatorio(semente_mapa):
+            ambiente = Ambiente()
+        if tamanho_celula:
+            ambiente.construir_grade(tamanho_celula)
+            ambiente.construir_indice_recursos()
+        for semente_episodio in sementes_episodios:
+            with fluxo_aleatorio(semente_episodio):
+                x_ini, y_ini = ambiente.posicao_segura()
+                episodios.append((ambiente, x_ini, y_ini, random.getstate()))
+    return episodios
+
+
+def avaliar_em_episodios(individuo, episodios, max_tempo=None):
+    # Cada episódio parte de seu próprio estado de random, então o resultado não
+    # depende de quem mais foi avaliado antes no mesmo processo
+    robo = Robo(0, 0)
+    fitness = 0
+    for ambiente, x_ini, y_ini, estado_rng in episodios:
+        with fluxo_aleatorio(estado=estado_rng):
+            ambiente.reset()
+            robo.reset(x_ini, y_ini)
+            fitness += simular_episodio(individuo, ambiente, robo, max_tempo)
+    return fitness / len(episodios)
+
+
+class BancoAmbientes:
+    """Conjunto de K ambientes semeados (com posições iniciais) compartilhado pela população.
+
+    Políticas de renovação:
+    - 'execucao': os ambientes são gerados uma vez e valem para a execução inteira
+    - 'geracao': todos são regenerados a cada intervalo_renovacao gerações
+    - 'rotacao': a cada intervalo_renovacao gerações os num_rotacao mais antigos
+      são substituídos por novos
+    """
+
+    POLITICAS = ('execucao', 'geracao', 'rotacao')
+
+    def __init__(self, semente, num_ambientes=1, episodios_por_ambiente=3,
+                 politica='geracao', intervalo_renovacao=1, num_rotacao=1,
+                 tamanho_celula=None):
+        if politica not in self.POLITICAS:
+            raise ValueError(f"Política de renovação desconhecida: {politica}")
+        self.semente = semente
+        self.num_ambientes = num_ambientes
+        self.episodios_por_ambiente = episodios_por_ambiente
+        self.politica = politica
+        self.intervalo_renovacao = max(1, intervalo_renovacao)
+        self.num_rotacao = num_rotacao
+        self.tamanho_celula = tamanho_celula
+        self.entradas = []
+        self.criados = 0  # Contador usado para derivar a semente de cada novo ambiente
+        self.geracao_atual = None
+        self._episodios = {}  # semente_mapa -> episódios materializados
+
+    def _nova_entrada(self):
+        semente_mapa = derivar_semente(self.semente, 'mapa', self.criados)
+        sementes = tuple(derivar_semente(self.semente, 'episodio', self.criados, ep)
+                         for ep in range(self.episodios_por_ambiente))
+        self.criados += 1
+        return (semente_mapa, sementes)
+
+    def atualizar(self, geracao):
+        # Aplica a política de renovação; chamadas repetidas na mesma geração não fazem nada
+        if geracao == self.geracao_atual:
+            return
+        self.geracao_atual = geracao
+        if not self.entradas:
+            self.entradas = [self._nova_entrada() for _ in range(self.num_ambientes)]
+        elif self.politica != 'execucao' and geracao % self.intervalo_renovacao == 0:
+            if self.politica == 'geracao':
+                self.entradas = [self._nova_entrada() for _ in range(self.num_ambientes)]
+            else:
+                n = min(self.num_rotacao, self.num_ambientes)
+                self.entradas = self.entradas[n:] + [self._nova_entrada() for _ in range(n)]
+        vigentes = {entrada[0] for entrada in self.entradas}
+        self._episodios = {chave: valor for chave, valor in self._episodios.items()
+                           if chave in vigentes}
+
+    def __getstate__(self):
+        # Os episódios materializados são refeitos sob demanda a partir das sementes
+        estado = self.__dict__.copy()
+        estado['_episodios'] = {}
+        return estado
+
+    def identificador(self):
+        # Muda sempre que o conjunto de cenários muda; usado como chave do cache de fitness
+        return tuple(self.entradas)
+
+    def episodios(self):
+        resultado = []
+        for entrada in self.entradas:
+            if entrada[0] not in self._episodios:
+                with _medir('ambientes'):
+                    self._episodios[entrada[0]] = construir_episodios([entrada],
+                                                                      self.tamanho_celula)
+            resultado.extend(self._episodios[entrada[0]])
+        return resultado
+
+
+_EPISODIOS_WORKER = {}
+
+
+def _avaliar_bloco(entradas, motor, genomas, tamanho_celula=None,
+                   num_episodios=None, max_tempo=None):
+    # Executado nos processos do pool: recebe genomas serializados e devolve o fitness
+    # e os passos simulados.
+    # Os ambientes são reconstruídos a partir das sementes só quando o banco muda
+    chave = (entradas, tamanho_celula)
+    episodios = _EPISODIOS_WORKER.get(chave)
+    if episodios is None:
+        _EPISODIOS_WORKER.clear()
+        episodios = _EPISODIOS_WORKER[chave] = construir_episodios(entradas, tamanho_celula)
+    individuos = [IndividuoPG.desserializar(genoma) for genoma in genomas]
+    passos = _passos_simulados
+    fitness = _avaliar_individuos(individuos, episodios[:num_episodios], motor, max_tempo)
+    return fitness, _passos_simulados - passos
+
+
+def _avaliar_individuos(individuos, episodios, motor, max_tempo=None):
+    if motor == 'lote':
+        return MotorLote(episodios, max_tempo=max_tempo).avaliar(individuos).tolist()
+    return [avaliar_em_episodios(individuo, episodios, max_tempo) for individuo in individuos]
+
+
+_MEMORIAS_WORKER = {}  # tipo -> (nome, SharedMemory) anexada neste processo
+
+
+def _anexar_memoria(tipo, nome):
+    # Mantém um bloco anexado por tipo; ao mudar de nome o anterior é solto
+    anexada = _MEMORIAS_WORKER.get(tipo)
+    if anexada is not None and anexada[0] == nome:
+        return anexada[1]
+    if anexada is not None:
+        anexada[1].close()
+    memoria = shared_memory.SharedMemory(name=nome)
+    _MEMORIAS_WORKER[tipo] = (nome, memoria)
+    return memoria
+
+
+class ArenaGenomas:
+    """Genomas de uma população num bloco de multiprocessing.shared_memory.
+
+    O descritor (nome, n, total) basta para um worker anexar o bloco e ler
+    os indivíduos de um intervalo. Layout: consts float64[total],
+    offsets int64[2n + 1], fitness float64[n] e ops int8[total]; as árvores
+    do indivíduo i ocupam [offsets[2i], offsets[2i + 1]) (aceleração) e
+    [offsets[2i + 1], offsets[2i + 2]) (rotação). Os workers escrevem o
+    fitness direto no bloco. O bloco é reaproveitado enquanto couber.
+    """
+
+    def __init__(self):
+        self._memoria = None
+
+    @staticmethod
+    def _tamanho(n, total):
+        return 8 * (total + 3 * n + 1) + total
+
+    @staticmethod
+    def _vistas(buf, n, total):
+        consts = np.ndarray(total, np.float64, buf, 0)
+        offsets = np.ndarray(2 * n + 1, np.int64, buf, 8 * total)
+        fitness = np.ndarray(n, np.float64, buf, 8 * (total + 2 * n + 1))
+        ops = np.ndarray(total, np.int8, buf, 8 * (total + 3 * n + 1))
+        return consts, offsets, fitness, ops
+
+    def escrever(self, individuos):
+        """Copia os genomas para o bloco e devolve o descritor"""
+        genomas = [genoma for individuo in individuos
+                   for genoma in (individuo.genoma_aceleracao, individuo.genoma_rotacao)]
+        n = len(individuos)
+        total = sum(len(genoma) for genoma in genomas)
+        tamanho = self._tamanho(n, total)
+        if self._memoria is None or self._memoria.size < tamanho:
+            self.fechar()
+            # Folga para a população crescer sem recriar o bloco a cada geração
+            self._memoria = shared_memory.SharedMemory(create=True, size=tamanho * 3 // 2)
+        consts, offsets, fitness, ops = self._vistas(self._memoria.buf, n, total)
+        offsets[0] = 0
+        np.cumsum([len(genoma) for genoma in genomas], out=offsets[1:])
+        ops[:] = np.frombuffer(b''.join(genoma.ops.tobytes() for genoma in genomas), np.int8)
+        consts[:] = np.frombuffer(b''.join(genoma.consts.tobytes() for genoma in genomas))
+        fitness[:] = np.nan
+        return (self._memoria.name, n, total)
+
+    def fitness(self, descritor):
+        _, n, total = descritor
+        return self._vistas(self._memoria.buf, n, total)[2].tolist()
+
+    @classmethod
+    def ler(cls, descritor, inicio, fim, profundidade=5):
+        """Indivíduos [inicio, fim) do bloco (executado nos workers)"""
+        nome, n, total = descritor
+        consts, offsets, _, ops = cls._vistas(_anexar_memoria('genomas', nome).buf, n, total)
+        individuos = []
+        for i in range(inicio, fim):
+            a, b, c = offsets[2 * i:2 * i + 3].tolist()
+            individuos.append(IndividuoPG.de_genomas(
+                GenomaPG.de_bytes(ops[a:b].tobytes(), consts[a:b].tobytes()),
+                GenomaPG.de_bytes(ops[b:c].tobytes(), consts[b:c].tobytes()), profundidade))
+        return individuos
+
+    @classmethod
+    def gravar_fitness(cls, descritor, inicio, valores):
+        nome, n, total = descritor
+        fitness = cls._vistas(_anexar_memoria('genomas', nome).buf, n, total)[2]
+        fitness[inicio:inicio + len(valores)] = valores
+
+    def fechar(self):
+        if self._memoria is not None:
+            self._memoria.close()
+            self._memoria.unlink()
+            self._memoria = None
+
+
+class ArenaAmbientes:
+    """Episódios (cenas e estados iniciais) num bloco de shared_memory somente leitura.
+
+    Tudo é guardado como float64: por ambiente largura, altura, max_tempo,
+    meta (x, y, raio) e os intervalos de obstáculos e recursos; por episódio
+    o ambiente, a posição inicial e o estado do random (625 palavras e
+    gauss_next, NaN para None). O descritor é (nome, ambientes, episódios,
+    obstáculos, recursos). Cada mudança no banco de ambientes cria um bloco novo.
+    """
+
+    ESTADO_RNG = 625
+
+    def __init__(self, episodios):
+        ambientes = []
+        for ambiente, _, _, _ in episodios:
+            if not any(ambiente is outro for outro in ambientes):
+                ambientes.append(ambiente)
+        cenas = [ambiente.cena() for ambiente in ambientes]
+        k, e = len(ambientes), len(episodios)
+        o = sum(len(cena['obstaculos']) for cena in cenas)
+        r = sum(len(cena['recursos']) for cena in cenas)
+        dados = np.concatenate([
+            np.array([[cena['largura'], cena['altura'], cena['max_tempo'], *cena['meta']]
+                      for cena in cenas]).ravel(),
+            np.cumsum([0] + [len(cena['obstaculos']) for cena in cenas]),
+            np.cumsum([0] + [len(cena['recursos']) for cena in cenas]),
+            np.concatenate([cena['obstaculos'] for cena in cenas]).ravel(),
+            np.concatenate([cena['recursos'] for cena in cenas]).ravel(),
+            np.array([[next(i for i, a in enumerate(ambientes) if a is ambiente), x, y,
+                       *estado[1], np.nan if estado[2] is None else estado[2]]
+                      for ambiente, x, y, estado in episodios], dtype=float).ravel(),
+        ])
+        self._memoria = shared_memory.SharedMemory(create=True, size=max(8, dados.nbytes))
+        np.ndarray(len(dados), np.float64, self._memoria.buf)[:] = dados
+        self.descritor = (self._memoria.name, k, e, o, r)
+
+    @classmethod
+    def ler(cls, descritor, tamanho_celula=None):
+        """Reconstrói os episódios no formato de construir_episodios (executado nos workers)"""
+        nome, k, e, o, r = descritor
+        largura_episodio = 3 + cls.ESTADO_RNG + 1
+        dados = np.ndarray(6 * k + 2 * (k + 1) + 4 * o + 2 * r + largura_episodio * e,
+                           np.float64, _anexar_memoria('ambientes', nome).buf)
+        posicao = 0
+
+        def secao(tamanho, forma):
+            nonlocal posicao
+            valores = dados[posicao:posicao + tamanho].reshape(forma).copy()
+            posicao += tamanho
+            return valores
+
+        cabecalhos = secao(6 * k, (k, 6))
+        inicio_obstaculos = secao(k + 1, (k + 1,)).astype(int)
+        inicio_recursos = secao(k + 1, (k + 1,)).astype(int)
+        obstaculos = secao(4 * o, (o, 4))
+        recursos = secao(2 * r, (r, 2))
+        linhas = secao(largura_episodio * e, (e, largura_episodio))
+        del dados
+
+        ambientes = []
+        for i, (largura, altura, max_tempo, *meta) in enumerate(cabecalhos.tolist()):
+            ambiente = Ambiente.de_cena({
+                'largura': largura, 'altura': altura, 'max_tempo': max_tempo, 'meta': meta,
+                'obstaculos': obstaculos[inicio_obstaculos[i]:inicio_obstaculos[i + 1]],
+                'recursos': recursos[inicio_recursos[i]:inicio_recursos[i + 1]]})
+            if tamanho_celula:
+                ambiente.construir_grade(tamanho_celula)
+                ambiente.construir_indice_recursos()
+            ambientes.append(ambiente)
+        episodios = []
+        for linha in linhas.tolist():
+            gauss = linha[-1]
+            estado = (3, tuple(int(v) for v in linha[3:-1]), None if math.isnan(gauss) else gauss)
+            episodios.append((ambientes[int(linha[0])], linha[1], linha[2], estado))
+        return episodios
+
+    def fechar(self):
+        if self._memoria is not None:
+            self._memoria.close()
+            self._memoria.unlink()
+            self._memoria = None
+
+
+def _avaliar_bloco_compartilhado(genomas, inicio, fim, ambientes, motor, tamanho_celula=None,
+                                 num_episodios=None, max_tempo=None):
+    # Como _avaliar_bloco, mas lê genomas e episódios dos blocos de memória
+    # compartilhada e grava o fitness de volta no bloco dos genomas; devolve os passos
+    chave = (ambientes, tamanho_celula)
+    episodios = _EPISODIOS_WORKER.get(chave)
+    if episodios is None:
+        _EPISODIOS_WORKER.clear()
+        episodios = _EPISODIOS_WORKER[chave] = ArenaAmbientes.ler(ambientes, tamanho_celula)
+    individuos = ArenaGenomas.ler(genomas, inicio, fim)
+    passos = _passos_simulados
+    valores = _avaliar_individuos(individuos, episodios[:num_episodios], motor, max_tempo)
+    ArenaGenomas.gravar_fitness(genomas, inicio, valores)
+    return _passos_simulados - passos
+
+
+def destinos_topologia(topologia, num_ilhas):
+    """Lista, para cada ilha, as ilhas para onde seus migrantes vão.
+
+    topologia: 'anel' (i -> i+1, como em migrar), 'anel_duplo' (i -> i-1 e i+1),
+    'completa' (todas as outras) ou uma sequência/dict {ilha: [destinos]}.
+    """
+    if topologia == 'anel':
+        return [[(i + 1) % num_ilhas] for i in range(num_ilhas)]
+    if topologia == 'anel_duplo':
+        return [sorted({(i - 1) % num_ilhas, (i + 1) % num_ilhas} - {i}) or [i]
+                for i in range(num_ilhas)]
+    if topologia == 'completa':
+        return [[j for j in range(num_ilhas) if j != i] or [i] for i in range(num_ilhas)]
+    if isinstance(topologia, str):
+        raise ValueError(f"Topologia desconhecida: {topologia}")
+    if isinstance(topologia, dict):
+        topologia = [topologia.get(i, ()) for i in range(num_ilhas)]
+    destinos = [sorted(set(d)) for d in topologia]
+    if len(destinos) != num_ilhas or any(not 0 <= j < num_ilhas for d in destinos for j in d):
+        raise ValueError("A topologia deve listar destinos válidos para cada ilha")
+    return destinos
+
+
+def _executar_ilha(indice, atributos, genomas, n_geracoes, intervalo_migracao, num_migrantes,
+                   num_origens, entrada, destinos, resultados, semente):
+    # Processo de uma ilha em evoluir_ilhas_processos: evolui sozinha e troca os
+    # num_migrantes melhores (genomas serializados) pelas filas a cada intervalo.
+    # A troca é síncrona entre vizinhas: a ilha só segue depois de receber os
+    # migrantes de todas as suas origens naquela rodada
+    try:
+        with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+            random.seed(semente)
+            pg = ProgramacaoGenetica.__new__(ProgramacaoGenetica)
+            for nome, valor in atributos.items():
+                setattr(pg, nome, valor)
+            pg.num_ilhas = 1
+            pg.num_workers = None
+            pg._executor = None
+            pg._arena_genomas = pg._arena_ambientes = None
+            pg.estatisticas_corrida = None
+            pg.estatisticas_clones = None
+            pg.melhor_individuo = None
+            pg.melhor_fitness = float('-inf')
+            pg.historico_fitness = []
+            pg.populacoes = [_individuos_de_genomas(genomas, pg.profundidade)]
+
+            rodadas = collections.defaultdict(list)  # rodada -> mensagens recebidas
+            for geracao in range(n_geracoes):
+                melhor_anterior = pg.melhor_individuo
+                pg._nova_geracao(geracao, n_geracoes)
+                ilha = pg.populacoes[0]
+
+                if (geracao + 1) % intervalo_migracao == 0:
+                    migrantes = sorted(ilha, key=lambda x: x.fitness, reverse=True)[:num_migrantes]
+                    mensagem = (indice, geracao, _genomas_de_individuos(migrantes))
+                    for fila in destinos:
+                        fila.put(mensagem)
+                    # Uma origem mais adiantada pode já ter mandado a rodada seguinte
+                    while len(rodadas[geracao]) < num_origens:
+                        origem, rodada, recebidos = entrada.get()
+                        rodadas[rodada].append((origem, recebidos))
+                    chegaram = []
+                    for _, recebidos in sorted(rodadas.pop(geracao)):
+                        chegaram.extend(_individuos_de_genomas(recebidos, pg.profundidade))
+                    chegaram = chegaram[:len(ilha)]
+                    if chegaram:
+                        ilha[-len(chegaram):] = chegaram
+
+                if (geracao + 1) % 3 == 0:
+                    pg.injetar_diversidade()
+
+                melhor = None
+                if pg.melhor_individuo is not melhor_anterior:
+                    melhor = pg.melhor_individuo.serializar()
+                resultados.put(('geracao', indice, geracao, pg.melhor_fitness, melhor))
+
+            resultados.put(('fim', indice, _genomas_de_individuos(pg.populacoes[0]),
+                            pg.banco_ambientes))
+    except Exception:
+        resultados.put(('erro', indice, traceback.format_exc()))
+
+
+def _genomas_de_individuos(individuos):
+    return [(individuo.serializar(), individuo.fitness) for individuo in individuos]
+
+
+def _individuos_de_genomas(genomas, profundidade):
+    individuos = []
+    for genoma, fitness in genomas:
+        individuo = IndividuoPG.desserializar(genoma, profundidade)
+        individuo.fitness = fitness
+        individuos.append(individuo)
+    return individuos
+
+
+class CacheFitness:
+    """Cache LRU de fitness indexado por (hash estrutural, identificador dos cenários)"""
+
+    def __init__(self, capacidade=10000):
+        self.capacidade = capacidade
+        self.valores = collections.OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave):
+        valor = self.valores.get(chave)
+        if valor is None:
+            self.falhas += 1
+            return None
+        self.valores.move_to_end(chave)
+        self.acertos += 1
+        return valor
+
+    def guardar(self, chave, valor):
+        self.valores[chave] = valor
+        self.valores.move_to_end(chave)
+        while len(self.valores) > self.capacidade:
+            self.valores.popitem(last=False)
+
+    def estatisticas(self):
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / total if total else 0.0,
+            'tamanho': len(self.valores)
+        }
+
+
+class ModeloSubstituto:
+    """Regressão ridge (NumPy puro) que estima o fitness sem simular.
+
+    As características são as saídas nas SONDAS (saidas_sondas) e o tamanho
+    das árvores antes e depois da simplificação; o alvo é log(fitness), já
+    que o fitness é sempre >= 1 e muito assimétrico. O treino é online: cada
+    geração acrescenta os fitness simulados (um por genoma, o mais recente,
+    até capacidade genomas) e o modelo é reajustado na próxima previsão.
+    """
+
+    def __init__(self, capacidade=2000, regularizacao=1.0, min_amostras=30):
+        self.capacidade = capacidade
+        self.regularizacao = regularizacao
+        self.min_amostras = min_amostras
+        self.amostras = collections.OrderedDict()  # hash estrutural -> (características, alvo)
+        self._pesos = None
+
+    @staticmethod
+    def caracteristicas(individuo):
+        nos = individuo.contagem_nos()
+        tamanhos = [valor for tipo in ('aceleracao', 'rotacao') for valor in nos[tipo]]
+        return np.concatenate([individuo.saidas_sondas(), np.log1p(tamanhos)])
+
+    def pronto(self):
+        return len(self.amostras) >= self.min_amostras
+
+    def adicionar(self, individuos):
+        for individuo in individuos:
+            chave = individuo.hash_estrutural()
+            self.amostras.pop(chave, None)
+            self.amostras[chave] = (self.caracteristicas(individuo),
+                                    math.log(max(1.0, individuo.fitness)))
+        while len(self.amostras) > self.capacidade:
+            self.amostras.popitem(last=False)
+        self._pesos = None
+
+    def _ajustar(self):
+        x = np.array([c for c, _ in self.amostras.values()])
+        y = np.array([alvo for _, alvo in self.amostras.values()])
+        self._media = x.mean(axis=0)
+        self._escala = x.std(axis=0)
+        self._escala[self._escala == 0] = 1.0
+        z = (x - self._media) / self._escala
+        a = z.T @ z + self.regularizacao * np.eye(z.shape[1])
+        self._pesos = np.linalg.solve(a, z.T @ (y - y.mean()))
+        self._intercepto = y.mean()
+
+    def prever(self, individuos):
+        """Fitness estimado (em escala log) de cada indivíduo"""
+        if self._pesos is None:
+            self._ajustar()
+        x = np.array([self.caracteristicas(individuo) for individuo in individuos])
+        return ((x - self._media) / self._escala) @ self._pesos + self._intercepto
+
+
+def _postos(valores):
+    # Postos com empates recebendo a média das posições que ocupam
+    valores = np.asarray(valores, dtype=float)
+    ordem = np.argsort(valores, kind='stable')
+    _, inicio, contagem = np.unique(valores[ordem], return_index=True, return_counts=True)
+    postos = np.empty(len(valores))
+    postos[ordem] = np.repeat(inicio + (contagem - 1) / 2, contagem)
+    return postos
+
+
+def correlacao_postos(a, b):
+    """Correlação de Spearman; None com menos de 3 pontos ou valores todos iguais"""
+    if len(a) < 3:
+        return None
+    postos_a, postos_b = _postos(a), _postos(b)
+    if postos_a.std() == 0 or postos_b.std() == 0:
+        return None
+    return float(np.corrcoef(postos_a, postos_b)[0, 1])
+
+
+class CheckpointPG:
+    """Checkpoints incrementais e atômicos de uma execução, gravados em um diretório.
+
+    Os genomas vão para genomas-<época>.bin como registros binários
+    (hash estrutural, tamanhos e bytes dos arrays), cada um gravado uma só
+    vez; a cada checkpoint só os genomas novos são anexados. estado.pkl
+    guarda o resto (populações como índices de indivíduos, fitness,
+    histórico, melhor, geração, estado do random, banco de ambientes e cache
+    de fitness) e o tamanho válido do arquivo de genomas. Ele é escrito num
+    temporário e trocado com os.replace: uma queda no meio da gravação deixa
+    o checkpoint anterior intacto. Quando o arquivo acumula muitos genomas
+    mortos, uma nova época é gravada só com os vivos.
+    """
+
+    REGISTRO = struct.Struct('<16s4I')
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self._gravados = None  # hashes presentes no arquivo de genomas atual
+        self._epoca = 0
+        self._tamanho = 0
+
+    def _caminho(self, nome):
+        return os.path.join(self.diretorio, nome)
+
+    def _arquivo_genomas(self, epoca):
+        return self._caminho(f"genomas-{epoca}.bin")
+
+    def existe(self):
+        return os.path.exists(self._caminho('estado.pkl'))
+
+    def _ler_estado(self):
+        with open(self._caminho('estado.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+    def _ler_genomas(self, epoca, tamanho):
+        genomas = {}
+        with open(self._arquivo_genomas(epoca), 'rb') as f:
+            dados = f.read(tamanho)
+        posicao = 0
+        while posicao < len(dados):
+            chave, *tamanhos = self.REGISTRO.unpack_from(dados, posicao)
+            posicao += self.REGISTRO.size
+            partes = []
+            for n in tamanhos:
+                partes.append(dados[posicao:posicao + n])
+                posicao += n
+            genomas[chave] = tuple(partes)
+        return genomas
+
+    def _abrir(self):
+        # Retoma o arquivo de genomas do último checkpoint válido, descartando
+        # registros anexados depois dele (gravação interrompida)
+        self._gravados = set()
+        if not self.existe():
+            return
+        estado = self._ler_estado()
+        self._epoca, self._tamanho = estado['genomas']
+        self._gravados = set(self._ler_genomas(self._epoca, self._tamanho))
+        with open(self._arquivo_genomas(self._epoca), 'r+b') as f:
+            f.truncate(self._tamanho)
+
+    def gravar(self, estado, individuos):
+        """Grava estado (dict serializável) e os genomas dos indivíduos referenciados"""
+        os.makedirs(self.diretorio, exist_ok=True)
+        if self._gravados is None:
+            self._abrir()
+        vivos = {individuo.hash_estrutural(): individuo for individuo in individuos}
+
+        epoca_anterior = None
+        if not self._gravados or len(self._gravados) > 4 * len(vivos):
+            epoca_anterior = self._epoca if self._gravados else None
+            self._epoca += 1
+            self._gravados = set()
+            self._tamanho = 0
+
+        with open(self._arquivo_genomas(self._epoca), 'ab') as f:
+            for chave, individuo in vivos.items():
+                if chave in self._gravados:
+                    continue
+                partes = individuo.serializar()
+                f.write(self.REGISTRO.pack(chave, *(len(parte) for parte in partes)))
+                for parte in partes:
+                    f.write(parte)
+                self._gravados.add(chave)
+            f.flush()
+            os.fsync(f.fileno())
+            self._tamanho = f.tell()
+
+        estado = dict(estado, genomas=(self._epoca, self._tamanho))
+        temporario = self._caminho('estado.pkl.tmp')
+        with open(temporario, 'wb') as f:
+            pickle.dump(estado, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self._caminho('estado.pkl'))
+
+        if epoca_anterior is not None and epoca_anterior != self._epoca:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._arquivo_genomas(epoca_anterior))
+
+    def carregar(self):
+        """Devolve (estado, {hash: bytes do genoma}) do último checkpoint"""
+        estado = self._ler_estado()
+        return estado, self._ler_genomas(*estado['genomas'])
 
 
 class ProgramacaoGenetica:
     def __init__(self, tamanho_populacao=60, profundidade=5, num_ilhas=5,
-                 elitismo=0.05, prob_mutacao=0.4, metodo_selecao='torneio'):
+                 elitismo=0.05, prob_mutacao=0.4, metodo_selecao='torneio',
+                 semente=None, motor='escalar', num_workers=None, tamanho_bloco=None,
+                 tamanho_cache=10000, num_ambientes=1, episodios_por_ambiente=3,
+                 politica_ambientes='geracao', intervalo_renovacao=1, tamanho_celula=None,
+                 estagios_corrida=None, fracao_promocao=0.5, impressao_comportamental=False,
+                 substituir_clones=False, candidatos_por_vaga=1, memoria_compartilhada=False):
         # Implementado sistema de ilhas para manter diversidade genética
         # Aumentado tamanho da população para 60 indivíduos
         # Ajustada probabilidade de mutação para 0.4
         # Implementado elitismo de 5%
+        # Com semente definida, a execução é reprodutível: todos os indivíduos são
+        # avaliados no mesmo banco de ambientes semeados (mapas, posições iniciais
+        # e sorteios de Robo.mover), renovado conforme politica_ambientes
+        # motor: 'escalar' (Robo/Ambiente) ou 'lote' (MotorLote, requer semente)
+        # num_workers > 1 distribui a avaliação em um ProcessPoolExecutor, em blocos
+        # de tamanho_bloco indivíduos (padrão: ~4 blocos por worker)
+        if motor == 'lote' and semente is None:
+            raise ValueError("O motor 'lote' requer uma semente")
+        # estagios_corrida: lista de (num_episodios, max_tempo) avaliados antes da
+        # avaliação completa; a cada estágio só a fração fracao_promocao melhor avança
+        if estagios_corrida and semente is None:
+            raise ValueError("A avaliação por corrida requer uma semente")
+        if num_workers and num_workers > 1 and semente is None:
+            # A avaliação paralela precisa de cenários determinísticos
+            semente = random.getrandbits(32)
+        self.semente = semente
+        self.motor = motor
+        self.num_workers = num_workers
+        self.tamanho_bloco = tamanho_bloco
+        self._executor = None
+        # memoria_compartilhada: com workers, genomas e episódios vão para os
+        # processos em blocos de shared_memory (ArenaGenomas, ArenaAmbientes) e
+        # cada tarefa leva só os descritores e um intervalo de índices
+        self.memoria_compartilhada = memoria_compartilhada
+        self._arena_genomas = None
+        self._arena_ambientes = None
+        # tamanho_celula ativa a GradeObstaculos (e o IndiceRecursos) em todos os
+        # ambientes avaliados
+        self.tamanho_celula = tamanho_celula
+        self.estagios_corrida = list(estagios_corrida or [])
+        self.fracao_promocao = fracao_promocao
+        self.estatisticas_corrida = None
+        # Genomas já avaliados nos mesmos cenários não são simulados de novo
+        # (elite, migrantes e clones gerados pelo crossover)
+        self.cache_fitness = CacheFitness(tamanho_cache) if tamanho_cache else None
+        # impressao_comportamental: genomas novos cujas saídas nas SONDAS coincidem
+        # com as de um já avaliado nos mesmos cenários herdam seu fitness sem
+        # simulação (uma aproximação: as sondas não cobrem todo o comportamento).
+        # Com substituir_clones, clones comportamentais da mesma geração são
+        # trocados por indivíduos aleatórios em vez de herdarem o fitness
+        self.cache_comportamental = (CacheFitness(tamanho_cache or 10000)
+                                     if impressao_comportamental else None)
+        self.substituir_clones = substituir_clones
+        self.estatisticas_clones = None
+        # candidatos_por_vaga > 1 gera vários filhos por vaga na reprodução e só o
+        # mais promissor segundo o ModeloSubstituto (treinado com os fitness já
+        # simulados) entra na população; até o modelo ter amostras, um filho por vaga
+        self.candidatos_por_vaga = candidatos_por_vaga
+        self.modelo_substituto = ModeloSubstituto() if candidatos_por_vaga > 1 else None
+        self.banco_ambientes = None
+        if semente is not None:
+            self.banco_ambientes = BancoAmbientes(
+                semente, num_ambientes, episodios_por_ambiente,
+                politica_ambientes, intervalo_renovacao,
+                tamanho_celula=tamanho_celula)
+        self.geracao = 0
+        if semente is not None:
+            random.seed(semente)
         self.tamanho_populacao = tamanho_populacao
         self.profundidade = profundidade
         self.num_ilhas = num_ilhas
@@ -765,58 +3515,270 @@ class ProgramacaoGenetica:
         # - Penalidades por colisões (-3000 pontos)
         # - Penalidades por recursos não coletados (-6000 pontos)
         # - Penalidade extra por atingir meta sem coletar todos recursos (-10000 pontos)
-        ambiente = Ambiente()
+        if self.semente is not None:
+            self.banco_ambientes.atualizar(self.geracao)
+            return avaliar_em_episodios(individuo, self.banco_ambientes.episodios())
+
+        with _medir('ambientes'):
+            ambiente = Ambiente()
+            if self.tamanho_celula:
+                ambiente.construir_grade(self.tamanho_celula)
+                ambiente.construir_indice_recursos()
         robo = Robo(ambiente.largura // 2, ambiente.altura // 2)
         fitness = 0
 
         for _ in range(3):  # Avaliação em 3 ambientes diferentes para robustez
             ambiente.reset()
-            x_ini, y_ini = ambiente.posicao_segura()
+            with _medir('ambientes'):
+                x_ini, y_ini = ambiente.posicao_segura()
             robo.reset(x_ini, y_ini)
-
-            while True:
-                sensores = robo.get_sensores(ambiente)
-                estado = ambiente.get_estado()
-                sensores['recursos_restantes'] = estado['recursos_restantes']
-
-                aceleracao = individuo.avaliar(sensores, 'aceleracao')
-                rotacao = individuo.avaliar(sensores, 'rotacao')
-
-                aceleracao = max(-1, min(1, aceleracao))
-                rotacao = max(-0.5, min(0.5, rotacao))
-
-                sem_energia = robo.mover(aceleracao, rotacao, ambiente)
-
-                if sem_energia or ambiente.passo():
-                    break
-
-            estado = ambiente.get_estado()
-
-            fitness_tentativa = (
-                robo.recursos_coletados * 5000 +
-                (8000 if (robo.meta_atingida and estado['recursos_restantes'] == 0) else 0) +
-                robo.energia * 5 +
-                robo.distancia_percorrida * 0.2 -
-                robo.colisoes * 3000 -
-                estado['recursos_restantes'] * 6000
-            )
-
-            if robo.meta_atingida and estado['recursos_restantes'] > 0:
-                fitness_tentativa -= 10000
-
-            fitness += max(1, fitness_tentativa)
+            fitness += simular_episodio(individuo, ambiente, robo)
 
         return fitness / 3
 
     def avaliar_populacoes(self):
-        # Avaliação paralela das ilhas
+        if self.banco_ambientes is not None:
+            self.banco_ambientes.atualizar(self.geracao)
+        individuos = [individuo for ilha in self.populacoes for individuo in ilha]
+        id_cenarios = self._id_cenarios()
+        if self.cache_fitness is None or id_cenarios is None:
+            fitness, _ = self._avaliar_pendentes(individuos)
+            self._registrar_fitness(individuos, fitness)
+            return
+
+        fitness = [None] * len(individuos)
+        pendentes = {}  # chave -> posições que aguardam simulação
+        for posicao, individuo in enumerate(individuos):
+            chave = (individuo.hash_estrutural(), id_cenarios)
+            if chave in pendentes:
+                # Clone de um genoma que já será simulado nesta geração
+                pendentes[chave].append(posicao)
+                self.cache_fitness.acertos += 1
+                continue
+            valor = self.cache_fitness.obter(chave)
+            if valor is None:
+                pendentes[chave] = [posicao]
+            else:
+                fitness[posicao] = valor
+
+        impressoes = {}
+        if self.cache_comportamental is not None:
+            pendentes, impressoes = self._agrupar_comportamento(
+                individuos, pendentes, fitness, id_cenarios)
+
+        novos, completos = self._avaliar_pendentes(
+            [individuos[posicoes[0]] for posicoes in pendentes.values()])
+        for (chave, posicoes), valor, completo in zip(pendentes.items(), novos, completos):
+            # Indivíduos eliminados na corrida não têm fitness completo para guardar
+            if completo:
+                self.cache_fitness.guardar(chave, valor)
+                if chave in impressoes:
+                    self.cache_comportamental.guardar(impressoes[chave], valor)
+            for posicao in posicoes:
+                fitness[posicao] = valor
+        self._registrar_fitness(individuos, fitness)
+
+    def _agrupar_comportamento(self, individuos, pendentes, fitness, id_cenarios):
+        # Segunda etapa de deduplicação, pela impressão comportamental: impressões
+        # já avaliadas nestes cenários reaproveitam o fitness, e clones desta
+        # geração são simulados uma vez só ou, com substituir_clones, trocados
+        # por indivíduos aleatórios (simulados sem nova verificação).
+        # Devolve (pendentes, {chave estrutural: chave comportamental})
+        agrupados = {}
+        impressoes = {}
+        representantes = {}  # chave comportamental -> chave estrutural simulada
+        reaproveitados = substituidos = 0
+        for chave, posicoes in pendentes.items():
+            chave_comportamental = (individuos[posicoes[0]].impressao_comportamental(),
+                                    id_cenarios)
+            valor = self.cache_comportamental.obter(chave_comportamental)
+            if valor is not None:
+                for posicao in posicoes:
+                    fitness[posicao] = valor
+                reaproveitados += len(posicoes)
+                continue
+            if chave_comportamental not in representantes:
+                representantes[chave_comportamental] = chave
+                impressoes[chave] = chave_comportamental
+                agrupados[chave] = list(posicoes)
+            elif not self.substituir_clones:
+                agrupados[representantes[chave_comportamental]].extend(posicoes)
+                self.cache_comportamental.acertos += 1
+                reaproveitados += len(posicoes)
+            else:
+                for posicao in posicoes:
+                    novo = individuos[posicao] = self._substituir(posicao)
+                    agrupados.setdefault((novo.hash_estrutural(), id_cenarios), []).append(posicao)
+                    substituidos += 1
+        self.estatisticas_clones = {'reaproveitados': reaproveitados,
+                                    'substituidos': substituidos}
+        return agrupados, impressoes
+
+    def _substituir(self, posicao):
+        # Troca o indivíduo da posição (na ordem ilha a ilha) por um novo aleatório
+        novo = IndividuoPG(self.profundidade)
         for ilha in self.populacoes:
-            for individuo in ilha:
-                individuo.fitness = self.avaliar_individuo(individuo)
+            if posicao < len(ilha):
+                ilha[posicao] = novo
+                return novo
+            posicao -= len(ilha)
+
+    def _id_cenarios(self):
+        # Sem semente cada avaliação sorteia um mundo novo e o fitness não pode ser reaproveitado
+        if self.semente is None:
+            return None
+        return self.banco_ambientes.identificador()
+
+    def _avaliar_pendentes(self, individuos):
+        # Devolve (fitness, avaliação_completa) para cada indivíduo
+        if self.estagios_corrida:
+            return self._avaliar_corrida(individuos)
+        return self._avaliar_lista(individuos), [True] * len(individuos)
+
+    def _avaliar_corrida(self, individuos):
+        # Successive halving: todos correm em um horizonte curto e só os melhores
+        # recebem mais episódios, até a avaliação completa. Quem é eliminado recebe
+        # a nota parcial reescalada para ficar abaixo de todos os que avançaram,
+        # preservando a ordem (estágio alcançado, nota) na seleção
+        if not individuos:
+            return [], []
+        episodios = self.banco_ambientes.episodios()
+        max_tempo = episodios[0][0].max_tempo
+        inicio_passos = _passos_simulados
+
+        vivos = list(range(len(individuos)))
+        eliminados = []
+        for num_episodios, horizonte in self.estagios_corrida:
+            if len(vivos) <= 1:
+                break
+            num_episodios = min(num_episodios or len(episodios), len(episodios))
+            horizonte = min(horizonte or max_tempo, max_tempo)
+            parciais = self._avaliar_lista([individuos[k] for k in vivos],
+                                           num_episodios, horizonte)
+
+            manter = max(1, math.ceil(len(vivos) * self.fracao_promocao))
+            ordem = sorted(range(len(vivos)), key=lambda j: parciais[j], reverse=True)
+            eliminados.append([(vivos[j], parciais[j]) for j in ordem[manter:]])
+            vivos = [vivos[j] for j in sorted(ordem[:manter])]
+
+        fitness = [None] * len(individuos)
+        completos = [False] * len(individuos)
+        inicio_completas = _passos_simulados
+        for k, valor in zip(vivos, self._avaliar_lista([individuos[k] for k in vivos])):
+            fitness[k] = valor
+            completos[k] = True
+        passos_usados = _passos_simulados - inicio_passos
+        # Os eliminados nunca rodam a avaliação completa; seu custo é estimado pelo
+        # custo médio medido das avaliações completas desta mesma corrida
+        custo_completo = (_passos_simulados - inicio_completas) / len(vivos)
+
+        piso = min(fitness[k] for k in vivos)
+        for grupo in reversed(eliminados):
+            if not grupo:
+                continue
+            maior = max(parcial for _, parcial in grupo)
+            for k, parcial in grupo:
+                fitness[k] = piso * (parcial / maior) * 0.999
+            piso = min(fitness[k] for k, _ in grupo)
+
+        passos_completos = round(custo_completo * len(individuos))
+        self.estatisticas_corrida = {
+            'passos_simulados': passos_usados,
+            'passos_completos': passos_completos,
+            'passos_economizados': passos_completos - passos_usados,
+            'avaliacoes_completas': len(vivos),
+        }
+        return fitness, completos
+
+    def _avaliar_lista(self, individuos, num_episodios=None, max_tempo=None):
+        # num_episodios/max_tempo restringem a avaliação (usados pela corrida)
+        if not individuos:
+            return []
+        if self.num_workers and self.num_workers > 1:
+            return self._avaliar_em_paralelo(individuos, num_episodios, max_tempo)
+
+        if self.motor == 'lote':
+            # Todos os indivíduos avançam juntos no mesmo MotorLote
+            episodios = self.banco_ambientes.episodios()[:num_episodios]
+            return MotorLote(episodios, max_tempo=max_tempo).avaliar(individuos).tolist()
+
+        if num_episodios is not None or max_tempo is not None:
+            episodios = self.banco_ambientes.episodios()[:num_episodios]
+            return [avaliar_em_episodios(individuo, episodios, max_tempo)
+                    for individuo in individuos]
+
+        # Avaliação serial, um indivíduo por vez
+        return [self.avaliar_individuo(individuo) for individuo in individuos]
+
+    def _avaliar_em_paralelo(self, individuos, num_episodios=None, max_tempo=None):
+        if self.memoria_compartilhada:
+            return self._avaliar_compartilhado(individuos, num_episodios, max_tempo)
+        genomas = [individuo.serializar() for individuo in individuos]
+        tamanho = self.tamanho_bloco or max(1, math.ceil(len(genomas) / (self.num_workers * 4)))
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers)
+        futuros = [
+            self._executor.submit(_avaliar_bloco, self.banco_ambientes.identificador(),
+                                  self.motor, genomas[inicio:inicio + tamanho],
+                                  self.tamanho_celula, num_episodios, max_tempo)
+            for inicio in range(0, len(genomas), tamanho)
+        ]
 
-                if individuo.fitness > self.melhor_fitness:
-                    self.melhor_fitness = individuo.fitness
-                    self.melhor_individuo = individuo
+        # Os resultados são reunidos na ordem de submissão, não na de conclusão
+        global _passos_simulados
+        fitness = []
+        for futuro in futuros:
+            valores, passos = futuro.result()
+            fitness.extend(valores)
+            _passos_simulados += passos
+        return fitness
+
+    def _avaliar_compartilhado(self, individuos, num_episodios=None, max_tempo=None):
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers)
+        if self._arena_genomas is None:
+            self._arena_genomas = ArenaGenomas()
+        id_cenarios = self.banco_ambientes.identificador()
+        if self._arena_ambientes is None or self._arena_ambientes[0] != id_cenarios:
+            if self._arena_ambientes is not None:
+                self._arena_ambientes[1].fechar()
+            self._arena_ambientes = (id_cenarios,
+                                     ArenaAmbientes(self.banco_ambientes.episodios()))
+        genomas = self._arena_genomas.escrever(individuos)
+        ambientes = self._arena_ambientes[1].descritor
+
+        n = len(individuos)
+        tamanho = self.tamanho_bloco or max(1, math.ceil(n / (self.num_workers * 4)))
+        futuros = [
+            self._executor.submit(_avaliar_bloco_compartilhado, genomas, inicio,
+                                  min(inicio + tamanho, n), ambientes, self.motor,
+                                  self.tamanho_celula, num_episodios, max_tempo)
+            for inicio in range(0, n, tamanho)
+        ]
+        global _passos_simulados
+        for futuro in futuros:
+            _passos_simulados += futuro.result()
+        return self._arena_genomas.fitness(genomas)
+
+    def _registrar_fitness(self, individuos, fitness):
+        # Atualiza o melhor na mesma ordem (ilha, posição) da avaliação serial
+        for individuo, valor in zip(individuos, fitness):
+            individuo.fitness = valor
+            if individuo.fitness > self.melhor_fitness:
+                self.melhor_fitness = individuo.fitness
+                self.melhor_individuo = individuo
+
+    def encerrar_workers(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._arena_genomas is not None:
+            self._arena_genomas.fechar()
+            self._arena_genomas = None
+        if self._arena_ambientes is not None:
+            self._arena_ambientes[1].fechar()
+            self._arena_ambientes = None
 
     def selecionar(self, ilha):
         # Implementação de dois métodos de seleção
@@ -845,11 +3807,16 @@ class ProgramacaoGenetica:
 
     def migrar(self):
         # Sistema de migração entre ilhas para manter diversidade
+        # Devolve os eventos (origem, destino, fitness dos migrantes) para a telemetria
+        eventos = []
         for i in range(self.num_ilhas):
             origem = self.populacoes[i]
             destino = self.populacoes[(i + 1) % self.num_ilhas]
             migrantes = sorted(origem, key=lambda x: x.fitness, reverse=True)[:2]  # Migra os 2 melhores
             destino[-2:] = migrantes
+            eventos.append({'origem': i, 'destino': (i + 1) % self.num_ilhas,
+                            'fitness': [float(m.fitness) for m in migrantes]})
+        return eventos
 
     def injetar_diversidade(self):
         # Injeção periódica de diversidade para evitar convergência prematura
@@ -859,72 +3826,568 @@ class ProgramacaoGenetica:
             for i in range(len(worst)):
                 ilha[ilha.index(worst[i])] = novos[i]
 
-    def evoluir(self, n_geracoes=20):
-        for geracao in range(n_geracoes):
-            print(f"\n🌍 Geração {geracao + 1}/{n_geracoes}")
+    def evoluir(self, n_geracoes=20, checkpoint=None, intervalo_checkpoint=1,
+                instrumentacao=None, telemetria=None):
+        # checkpoint: diretório onde o estado é gravado a cada intervalo_checkpoint
+        # gerações (e ao final); a execução pode continuar com retomar(checkpoint)
+        # instrumentacao: caminho de um arquivo JSONL ou uma Instrumentacao
+        # telemetria: caminho de um arquivo JSONL ou uma TelemetriaEvolucao
+        return self._evoluir(0, n_geracoes, checkpoint, intervalo_checkpoint, instrumentacao,
+                             telemetria)
+
+    def _evoluir(self, inicio, n_geracoes, checkpoint, intervalo_checkpoint,
+                 instrumentacao=None, telemetria=None):
+        global _instrumentacao_ativa, _telemetria_ativa
+        if isinstance(instrumentacao, str):
+            instrumentacao = Instrumentacao(instrumentacao)
+        if isinstance(telemetria, str):
+            telemetria = TelemetriaEvolucao(telemetria)
+        anteriores = _instrumentacao_ativa, _telemetria_ativa
+        for coletor in (instrumentacao, telemetria):
+            if coletor is not None:
+                coletor.iniciar()
+        if instrumentacao is not None:
+            _instrumentacao_ativa = instrumentacao
+        if telemetria is not None:
+            _telemetria_ativa = telemetria
+        try:
+            return self._executar_geracoes(inicio, n_geracoes, checkpoint, intervalo_checkpoint)
+        finally:
+            for coletor in (instrumentacao, telemetria):
+                if coletor is not None:
+                    coletor.encerrar()
+            _instrumentacao_ativa, _telemetria_ativa = anteriores
+
+    def _nova_geracao(self, geracao, n_geracoes):
+        # Avalia as ilhas, registra o histórico e substitui cada ilha pelos filhos
+        print(f"\n🌍 Geração {geracao + 1}/{n_geracoes}")
+        with _medir('avaliacao'):
             self.avaliar_populacoes()
-            print(f"🔥 Melhor fitness até agora: {self.melhor_fitness:.2f}")
-            self.historico_fitness.append(self.melhor_fitness)
+        if _instrumentacao_ativa is not None:
+            _instrumentacao_ativa.registrar_nos(self.populacoes)
+        if _telemetria_ativa is not None:
+            _telemetria_ativa.registrar_populacoes(self.populacoes)
+        print(f"🔥 Melhor fitness até agora: {self.melhor_fitness:.2f}")
+        if self.melhor_individuo is not None:
+            nos = self.melhor_individuo.contagem_nos()
+            print("✂️  Nós do melhor (original → simplificado): " +
+                  ", ".join(f"{tipo} {antes} → {depois}" for tipo, (antes, depois) in nos.items()))
+        if self.cache_fitness is not None and self._id_cenarios() is not None:
+            estatisticas = self.cache_fitness.estatisticas()
+            print(f"📦 Cache de fitness: {estatisticas['acertos']} acertos, "
+                  f"{estatisticas['falhas']} falhas ({estatisticas['taxa_acerto']:.0%})")
+        if self.estatisticas_corrida is not None:
+            corrida = self.estatisticas_corrida
+            print(f"🏁 Corrida: {corrida['passos_simulados']} passos simulados de "
+                  f"~{corrida['passos_completos']} na avaliação completa "
+                  f"({corrida['passos_economizados']} economizados, "
+                  f"{corrida['avaliacoes_completas']} avaliações completas)")
+            self.estatisticas_corrida = None
+        if self.modelo_substituto is not None:
+            self._atualizar_substituto()
+        if self.estatisticas_clones is not None:
+            clones = self.estatisticas_clones
+            print(f"🧬 Clones comportamentais: {clones['reaproveitados']} reaproveitados, "
+                  f"{clones['substituidos']} substituídos")
+            self.estatisticas_clones = None
+        self.historico_fitness.append(self.melhor_fitness)
+        self.geracao += 1
 
-            for idx, ilha in enumerate(self.populacoes):
+        for idx, ilha in enumerate(self.populacoes):
+            with _medir('selecao'):
                 selecionados = self.selecionar(ilha)
                 elite_size = max(1, int(self.elitismo * len(ilha)))
                 elite = sorted(ilha, key=lambda x: x.fitness, reverse=True)[:elite_size]
 
-                nova_geracao = elite.copy()
-
-                while len(nova_geracao) < len(ilha):
-                    pai1, pai2 = random.sample(selecionados, 2)
-                    filho = pai1.crossover(pai2)
-                    filho.mutacao(probabilidade=self.prob_mutacao)
-                    nova_geracao.append(filho)
-
-                self.populacoes[idx] = nova_geracao
-
-            self.migrar()
+            nova_geracao = elite.copy()
+
+            with _medir('reproducao'):
+                nova_geracao.extend(self._gerar_filhos(selecionados, len(ilha) - len(nova_geracao)))
+
+            self.populacoes[idx] = nova_geracao
+
+    def _gerar_filhos(self, selecionados, vagas):
+        modelo = self.modelo_substituto
+        candidatos = self.candidatos_por_vaga if modelo is not None and modelo.pronto() else 1
+        filhos = []
+        for _ in range(vagas * candidatos):
+            pai1, pai2 = random.sample(selecionados, 2)
+            filho = pai1.crossover(pai2)
+            filho.mutacao(probabilidade=self.prob_mutacao)
+            filhos.append(filho)
+        if candidatos == 1:
+            return filhos
+        # Cada vaga fica com o melhor dos seus candidatos segundo o modelo
+        previstos = modelo.prever(filhos).reshape(vagas, candidatos)
+        return [filhos[vaga * candidatos + melhor]
+                for vaga, melhor in enumerate(previstos.argmax(axis=1))]
+
+    def _atualizar_substituto(self):
+        # Mede o modelo nos genomas que ele ainda não viu e treina com a geração avaliada
+        modelo = self.modelo_substituto
+        unicos = {individuo.hash_estrutural(): individuo
+                  for ilha in self.populacoes for individuo in ilha}
+        novos = [individuo for chave, individuo in unicos.items()
+                 if chave not in modelo.amostras]
+        if modelo.pronto() and novos:
+            previstos = modelo.prever(novos)
+            correlacao = correlacao_postos(previstos, [individuo.fitness for individuo in novos])
+            if correlacao is not None:
+                print(f"🔮 Modelo substituto: correlação de postos {correlacao:.2f} "
+                      f"em {len(novos)} genomas novos ({len(modelo.amostras)} amostras)")
+        modelo.adicionar(unicos.values())
+
+    def _executar_geracoes(self, inicio, n_geracoes, checkpoint, intervalo_checkpoint):
+        gravador = CheckpointPG(checkpoint) if checkpoint is not None else None
+        medidor = _instrumentacao_ativa
+        telemetria = _telemetria_ativa
+        for geracao in range(inicio, n_geracoes):
+            self._nova_geracao(geracao, n_geracoes)
+
+            with _medir('migracao'):
+                eventos = self.migrar()
+            if telemetria is not None:
+                telemetria.registrar_migracoes(eventos)
 
             if (geracao + 1) % 3 == 0:  # Injeção de diversidade a cada 3 gerações
                 print("💥 Injetando diversidade na geração", geracao + 1)
-                self.injetar_diversidade()
+                with _medir('diversidade'):
+                    self.injetar_diversidade()
+
+            if gravador is not None and ((geracao + 1) % intervalo_checkpoint == 0 or
+                                         geracao + 1 == n_geracoes):
+                progresso = {'geracao': geracao + 1, 'n_geracoes': n_geracoes,
+                             'intervalo_checkpoint': intervalo_checkpoint}
+                with _medir('checkpoint'):
+                    gravador.gravar(*self._estado_checkpoint(progresso))
+
+            if medidor is not None:
+                medidor.finalizar_geracao(geracao + 1, self.melhor_fitness)
+            if telemetria is not None:
+                telemetria.finalizar_geracao(geracao + 1, self.melhor_fitness)
+
+        self.encerrar_workers()
+        return self.melhor_individuo, self.historico_fitness
 
+    def evoluir_assincrono(self, n_avaliacoes, em_voo=None, intervalo_migracao=None,
+                           intervalo_diversidade=None):
+        """Evolução steady-state, sem a barreira entre gerações de evoluir.
+
+        Mantém em_voo avaliações em andamento no pool (padrão: 2 por worker). A
+        cada resultado, o indivíduo avaliado entra na sua ilha no lugar do pior
+        e um novo filho é gerado por torneio nessa ilha e submetido. Migração e
+        injeção de diversidade seguem o número de avaliações concluídas (padrão:
+        uma e três populações inteiras). O banco de ambientes fica fixo durante
+        a execução, para que os fitness sejam comparáveis. Com workers a ordem
+        de conclusão, e portanto o resultado, não é determinística; sem workers
+        as avaliações são feitas uma a uma no processo. Devolve
+        (melhor_individuo, historico_fitness), com um ponto no histórico a cada
+        população avaliada.
+        """
+        paralelo = bool(self.num_workers and self.num_workers > 1)
+        em_voo = em_voo or (2 * self.num_workers if paralelo else 1)
+        tamanhos = [len(ilha) for ilha in self.populacoes]
+        total = sum(tamanhos)
+        intervalo_migracao = intervalo_migracao or total
+        intervalo_diversidade = intervalo_diversidade or 3 * total
+        if self.banco_ambientes is not None:
+            self.banco_ambientes.atualizar(self.geracao)
+        id_cenarios = self._id_cenarios()
+        usar_cache = self.cache_fitness is not None and id_cenarios is not None
+        if paralelo and self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers)
+
+        # As ilhas começam vazias e recebem cada indivíduo quando ele volta avaliado
+        pendentes = collections.deque(
+            (idx, individuo) for idx, ilha in enumerate(self.populacoes) for individuo in ilha)
+        self.populacoes = [[] for _ in self.populacoes]
+        em_andamento = {}  # futuro -> (ilha, indivíduo)
+        prontos = collections.deque()  # ((ilha, indivíduo), fitness) já conhecidos
+
+        def submeter(tarefa):
+            individuo = tarefa[1]
+            if usar_cache:
+                valor = self.cache_fitness.obter((individuo.hash_estrutural(), id_cenarios))
+                if valor is not None:
+                    prontos.append((tarefa, valor))
+                    return
+            if paralelo:
+                futuro = self._executor.submit(
+                    _avaliar_bloco, self.banco_ambientes.identificador(), self.motor,
+                    [individuo.serializar()], self.tamanho_celula)
+                em_andamento[futuro] = tarefa
+            else:
+                prontos.append((tarefa, self._avaliar_lista([individuo])[0]))
+
+        def proxima_tarefa(idx):
+            if pendentes:
+                return pendentes.popleft()
+            # Torneio de 3, como em selecionar, entre os já avaliados da ilha
+            ilha = self.populacoes[idx]
+            pai1, pai2 = (max(random.sample(ilha, min(3, len(ilha))), key=lambda x: x.fitness)
+                          for _ in range(2))
+            filho = pai1.crossover(pai2)
+            filho.mutacao(probabilidade=self.prob_mutacao)
+            return (idx, filho)
+
+        submetidas = concluidas = 0
+        while pendentes and submetidas < min(em_voo, n_avaliacoes):
+            submeter(pendentes.popleft())
+            submetidas += 1
+
+        while concluidas < n_avaliacoes:
+            if not prontos:
+                feitos, _ = concurrent.futures.wait(
+                    em_andamento, return_when=concurrent.futures.FIRST_COMPLETED)
+                for futuro in feitos:
+                    prontos.append((em_andamento.pop(futuro), futuro.result()[0][0]))
+            (idx, individuo), valor = prontos.popleft()
+            individuo.fitness = valor
+            if usar_cache:
+                self.cache_fitness.guardar((individuo.hash_estrutural(), id_cenarios), valor)
+
+            ilha = self.populacoes[idx]
+            if len(ilha) < tamanhos[idx]:
+                ilha.append(individuo)
+            else:
+                pior = min(range(len(ilha)), key=lambda i: ilha[i].fitness)
+                ilha[pior] = individuo
+            if valor > self.melhor_fitness:
+                self.melhor_fitness = valor
+                self.melhor_individuo = individuo
+            concluidas += 1
+
+            completas = all(len(ilha) == tamanho
+                            for ilha, tamanho in zip(self.populacoes, tamanhos))
+            if concluidas % intervalo_migracao == 0 and completas:
+                self.migrar()
+            if concluidas % intervalo_diversidade == 0:
+                print("💥 Injetando diversidade após", concluidas, "avaliações")
+                # Os novos indivíduos passam na frente dos filhos e substituem os piores
+                pendentes.extend((i, IndividuoPG(self.profundidade))
+                                 for i, tamanho in enumerate(tamanhos)
+                                 for _ in range(int(0.1 * tamanho)))
+            if concluidas % total == 0:
+                self.historico_fitness.append(self.melhor_fitness)
+                print(f"🌍 {concluidas}/{n_avaliacoes} avaliações | "
+                      f"🔥 Melhor fitness até agora: {self.melhor_fitness:.2f}")
+
+            while (submetidas < n_avaliacoes and
+                   len(em_andamento) + len(prontos) < em_voo):
+                submeter(proxima_tarefa(idx))
+                submetidas += 1
+
+        for futuro in em_andamento:
+            futuro.cancel()
+        self.encerrar_workers()
         return self.melhor_individuo, self.historico_fitness
 
-# =====================================================================
-# PARTE 3: EXECUÇÃO DO PROGRAMA (PARA O ALUNO MODIFICAR)
-# Esta parte contém a execução do programa e os parâmetros finais.
-# =====================================================================
+    def evoluir_ilhas_processos(self, n_geracoes=20, topologia='anel', intervalo_migracao=1,
+                                num_migrantes=2, contexto=None):
+        """Evolui cada ilha num processo próprio, com migração por mensagens.
+
+        Cada ilha roda o mesmo ciclo de evoluir (avaliação, seleção,
+        reprodução e injeção de diversidade a cada 3 gerações) e, a cada
+        intervalo_migracao gerações, envia os num_migrantes melhores como
+        genomas serializados para as ilhas vizinhas (ver destinos_topologia),
+        que os colocam no lugar dos últimos da população. O custo da migração
+        depende só do número de migrantes. Este processo coordena: junta o
+        melhor global e o histórico (um ponto por geração, quando todas as
+        ilhas a concluem). Com semente, cada ilha usa um fluxo aleatório
+        derivado dela e o resultado é reprodutível. Checkpoints e
+        instrumentação não se aplicam a este modo. Devolve
+        (melhor_individuo, historico_fitness), como evoluir.
+        """
+        destinos = destinos_topologia(topologia, self.num_ilhas)
+        origens = [sum(i in d for d in destinos) for i in range(self.num_ilhas)]
+        intervalo_migracao = max(1, intervalo_migracao)
+        base = self.semente if self.semente is not None else random.getrandbits(64)
+        atributos = {nome: getattr(self, nome) for nome in self._ATRIBUTOS_CHECKPOINT}
+
+        ctx = contexto or multiprocessing.get_context()
+        entradas = [ctx.Queue() for _ in range(self.num_ilhas)]
+        resultados = ctx.Queue()
+        processos = [
+            ctx.Process(target=_executar_ilha, daemon=True, args=(
+                i, atributos, _genomas_de_individuos(ilha), n_geracoes, intervalo_migracao,
+                num_migrantes, origens[i], entradas[i], [entradas[j] for j in destinos[i]],
+                resultados, derivar_semente(base, 'ilha', i)))
+            for i, ilha in enumerate(self.populacoes)
+        ]
+        for processo in processos:
+            processo.start()
+
+        melhor_inicial = self.melhor_fitness
+        inicio_historico = len(self.historico_fitness)
+        historicos = [[] for _ in processos]
+        campeoes = [None] * len(processos)  # (fitness, genoma) do melhor de cada ilha
+        finais = [None] * len(processos)
+        try:
+            while any(final is None for final in finais):
+                try:
+                    mensagem = resultados.get(timeout=1)
+                except queue.Empty:
+                    mortos = [i for i, p in enumerate(processos)
+                              if finais[i] is None and not p.is_alive()]
+                    if mortos:
+                        raise RuntimeError(f"Ilha {mortos[0]} terminou sem resultado")
+                    continue
+                tipo, idx = mensagem[:2]
+                if tipo == 'erro':
+                    raise RuntimeError(f"Falha na ilha {idx}:\n{mensagem[2]}")
+                if tipo == 'fim':
+                    finais[idx] = mensagem[2:]
+                    continue
+
+                _, _, geracao, fitness, genoma = mensagem
+                historicos[idx].append(fitness)
+                if genoma is not None:
+                    campeoes[idx] = (fitness, genoma)
+                concluidas = min(len(historico) for historico in historicos)
+                while len(self.historico_fitness) < inicio_historico + concluidas:
+                    g = len(self.historico_fitness) - inicio_historico
+                    melhor = max([melhor_inicial] + [h[g] for h in historicos])
+                    self.historico_fitness.append(melhor)
+                    print(f"🌍 Geração {g + 1}/{n_geracoes} | "
+                          f"🔥 Melhor fitness até agora: {melhor:.2f}")
+        finally:
+            for processo in processos:
+                if processo.is_alive() and any(final is None for final in finais):
+                    processo.terminate()
+                processo.join()
+
+        # Escolhido só no fim, em ordem de ilha: empates não dependem da ordem de chegada
+        for campeao in campeoes:
+            if campeao is not None and campeao[0] > self.melhor_fitness:
+                self.melhor_fitness, genoma = campeao
+                self.melhor_individuo = IndividuoPG.desserializar(genoma, self.profundidade)
+                self.melhor_individuo.fitness = self.melhor_fitness
+
+        self.populacoes = [_individuos_de_genomas(genomas, self.profundidade)
+                           for genomas, _ in finais]
+        self.banco_ambientes = finais[0][1]
+        self.geracao += n_geracoes
+        return self.melhor_individuo, self.historico_fitness
 
-# Executando o algoritmo
-if __name__ == "__main__":
-    print("Iniciando simulação de robô com programação genética avançada...")
-
-    pg = ProgramacaoGenetica(
-        tamanho_populacao=40,
-        profundidade=5,
-        num_ilhas=3,
-        elitismo=0.1,
-        prob_mutacao=0.3,
-        metodo_selecao='torneio'
-    )
+    # Atributos restaurados como estão; o executor e os episódios materializados
+    # são recriados sob demanda
+    _ATRIBUTOS_CHECKPOINT = (
+        'semente', 'motor', 'num_workers', 'tamanho_bloco', 'memoria_compartilhada',
+        'tamanho_celula',
+        'estagios_corrida', 'fracao_promocao', 'cache_fitness', 'cache_comportamental',
+        'substituir_clones', 'candidatos_por_vaga', 'modelo_substituto', 'banco_ambientes',
+        'geracao', 'tamanho_populacao', 'profundidade', 'num_ilhas', 'elitismo',
+        'prob_mutacao', 'metodo_selecao', 'melhor_fitness', 'historico_fitness')
+
+    def _estado_checkpoint(self, progresso):
+        # Indivíduos repetidos (elite, migrantes) continuam sendo o mesmo objeto
+        # ao retomar, o que preserva o comportamento de ilha.index em injetar_diversidade
+        individuos = []
+        indices = {}
+
+        def indice(individuo):
+            if id(individuo) not in indices:
+                indices[id(individuo)] = len(individuos)
+                individuos.append(individuo)
+            return indices[id(individuo)]
+
+        populacoes = [[indice(individuo) for individuo in ilha] for ilha in self.populacoes]
+        melhor = indice(self.melhor_individuo) if self.melhor_individuo is not None else None
+        estado = {
+            'atributos': {nome: getattr(self, nome) for nome in self._ATRIBUTOS_CHECKPOINT},
+            'individuos': [(individuo.hash_estrutural(), individuo.fitness)
+                           for individuo in individuos],
+            'populacoes': populacoes,
+            'melhor': melhor,
+            'random': random.getstate(),
+            'progresso': progresso,
+        }
+        return estado, individuos
 
-    melhor_individuo, historico = pg.evoluir(n_geracoes=15)
+    @classmethod
+    def carregar_checkpoint(cls, checkpoint):
+        """Reconstrói a execução gravada em checkpoint (sem continuar a evolução)"""
+        estado, genomas = CheckpointPG(checkpoint).carregar()
+        pg = cls.__new__(cls)
+        for nome, valor in estado['atributos'].items():
+            setattr(pg, nome, valor)
+        pg._executor = None
+        pg._arena_genomas = pg._arena_ambientes = None
+        pg.estatisticas_corrida = None
+        pg.estatisticas_clones = None
+
+        individuos = []
+        for chave, fitness in estado['individuos']:
+            individuo = IndividuoPG.desserializar(genomas[chave], pg.profundidade)
+            individuo.fitness = fitness
+            individuos.append(individuo)
+        pg.populacoes = [[individuos[i] for i in ilha] for ilha in estado['populacoes']]
+        pg.melhor_individuo = individuos[estado['melhor']] if estado['melhor'] is not None else None
+        pg.progresso_checkpoint = estado['progresso']
+        random.setstate(estado['random'])
+        return pg
 
-    print("\nSalvando o melhor indivíduo...")
-    melhor_individuo.salvar('melhor_robo.json')
+    @classmethod
+    def retomar(cls, checkpoint, n_geracoes=None, instrumentacao=None, telemetria=None):
+        """Continua a execução gravada em checkpoint com resultados idênticos aos da original.
 
-    print("Plotando evolução do fitness...")
-    plt.figure(figsize=(10, 5))
-    plt.plot(historico)
-    plt.title('Evolução do Fitness')
-    plt.xlabel('Geração')
-    plt.ylabel('Fitness')
-    plt.savefig('evolucao_fitness_robo.png')
-    plt.close()
+        Devolve (melhor_individuo, historico_fitness), como evoluir.
+        """
+        pg = cls.carregar_checkpoint(checkpoint)
+        progresso = pg.progresso_checkpoint
+        return pg._evoluir(progresso['geracao'], n_geracoes or progresso['n_geracoes'],
+                           checkpoint, progresso['intervalo_checkpoint'], instrumentacao,
+                           telemetria)
 
-    print("\nSimulando o melhor indivíduo...")
+
+# =====================================================================
+# PARTE 3: EXECUÇÃO DO PROGRAMA (PARA O ALUNO MODIFICAR)
+# Esta parte contém a execução do programa e os parâmetros finais.
+# =====================================================================
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Robô controlado por programação genética: evolução, simulação e avaliação",
+        epilog="Sem subcomando, equivale a 'evolve --simular' com os parâmetros padrão.")
+    comandos = parser.add_subparsers(dest='comando')
+
+    evoluir = comandos.add_parser('evolve', aliases=['evoluir'],
+                                  help='evolui uma população e salva o melhor indivíduo')
+    evoluir.add_argument('--populacao', type=int, default=40, help='indivíduos por ilha')
+    evoluir.add_argument('--profundidade', type=int, default=5)
+    evoluir.add_argument('--ilhas', type=int, default=3)
+    evoluir.add_argument('--geracoes', type=int, default=15)
+    evoluir.add_argument('--elitismo', type=float, default=0.1)
+    evoluir.add_argument('--mutacao', type=float, default=0.3, help='probabilidade de mutação')
+    evoluir.add_argument('--selecao', choices=('torneio', 'roleta'), default='torneio')
+    evoluir.add_argument('--semente', type=int, help='torna a execução reprodutível')
+    evoluir.add_argument('--workers', type=int, help='processos para a avaliação')
+    evoluir.add_argument('--motor', choices=('escalar', 'lote'), default='escalar',
+                         help="'lote' requer --semente")
+    evoluir.add_argument('--saida', default='melhor_robo.json', help='JSON do melhor indivíduo')
+    evoluir.add_argument('--grafico', default='evolucao_fitness_robo.png',
+                         help="PNG do histórico de fitness ('' para não gerar)")
+    evoluir.add_argument('--telemetria', help='JSONL com estatísticas por geração')
+    evoluir.add_argument('--kernel-fisico', action='store_true',
+                         help='usa os kernels Numba em Robo.mover (após verificar a paridade)')
+    evoluir.add_argument('--checkpoint', help='diretório de checkpoints')
+    evoluir.add_argument('--simular', action='store_true',
+                         help='ao final, simula o melhor indivíduo (janela, se houver display)')
+
+    simular = comandos.add_parser('simulate', aliases=['simular'],
+                                  help='simula um indivíduo salvo')
+    simular.add_argument('individuo', nargs='?', default='melhor_robo.json')
+    simular.add_argument('--semente', type=int, help='sorteia o mesmo ambiente a cada execução')
+    simular.add_argument('--gravar', help='grava a animação em .gif ou .mp4 (sem janela)')
+    simular.add_argument('--trajetoria', help='salva a trajetória (.npz ou diretório)')
+    simular.add_argument('--passos-por-quadro', type=int, default=1,
+                         help='passos de simulação por quadro desenhado ou gravado')
+
+    avaliar = comandos.add_parser('evaluate', aliases=['avaliar'],
+                                  help='calcula o fitness de um indivíduo salvo')
+    avaliar.add_argument('individuo', nargs='?', default='melhor_robo.json')
+    avaliar.add_argument('--semente', type=int, default=0)
+    avaliar.add_argument('--ambientes', type=int, default=1)
+    avaliar.add_argument('--episodios', type=int, default=3, help='episódios por ambiente')
+    avaliar.add_argument('--motor', choices=('escalar', 'lote'), default='escalar')
+    return parser
+
+
+def _simular_individuo(individuo, semente=None, gravar=None, arquivo_trajetoria=None,
+                       passos_por_quadro=1):
+    if semente is not None:
+        random.seed(semente)
     ambiente = Ambiente()
     robo = Robo(ambiente.largura // 2, ambiente.altura // 2)
-    simulador = Simulador(ambiente, robo, melhor_individuo)
+    if gravar or tem_display():
+        renderizador = Renderizador(ambiente, robo, individuo, passos_por_quadro)
+        if gravar:
+            quadros = renderizador.gravar(gravar)
+            print(f"Animação gravada em {gravar} ({quadros} quadros)")
+        else:
+            print("Executando simulação em tempo real...")
+            renderizador.exibir()
+        trajetoria = renderizador.trajetoria
+    else:
+        # Sem display: só a simulação, com o laço usado na avaliação
+        ambiente.reset()
+        robo.reset(*ambiente.posicao_segura(robo.raio))
+        trajetoria = Trajetoria(ambiente, robo.raio)
+        fitness = simular_episodio(individuo, ambiente, robo, trajetoria=trajetoria)
+        print(f"Fitness do episódio: {fitness:.2f} | Recursos: {robo.recursos_coletados} | "
+              f"Colisões: {robo.colisoes} | Meta atingida: {'Sim' if robo.meta_atingida else 'Não'}")
+    if arquivo_trajetoria:
+        trajetoria.salvar(arquivo_trajetoria)
+        print(f"Trajetória salva em {arquivo_trajetoria}")
+    return trajetoria
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0].startswith('-') and argv[0] not in ('-h', '--help')):
+        # Compatível com o script original: evolui e simula o melhor indivíduo
+        argv = ['evolve', '--simular'] + argv
+    parser = _criar_parser()
+    args = parser.parse_args(argv)
+
+    if args.comando in ('evolve', 'evoluir'):
+        if args.kernel_fisico:
+            try:
+                ativar_kernel_fisico()
+            except RuntimeError as erro:
+                parser.error(str(erro))
+        print("Iniciando simulação de robô com programação genética avançada...")
+        pg = ProgramacaoGenetica(
+            tamanho_populacao=args.populacao,
+            profundidade=args.profundidade,
+            num_ilhas=args.ilhas,
+            elitismo=args.elitismo,
+            prob_mutacao=args.mutacao,
+            metodo_selecao=args.selecao,
+            semente=args.semente,
+            motor=args.motor,
+            num_workers=args.workers
+        )
+        melhor_individuo, historico = pg.evoluir(n_geracoes=args.geracoes,
+                                                 checkpoint=args.checkpoint,
+                                                 telemetria=args.telemetria)
+
+        print("\nSalvando o melhor indivíduo...")
+        melhor_individuo.salvar(args.saida)
+
+        if args.grafico:
+            print("Plotando evolução do fitness...")
+            plt.figure(figsize=(10, 5))
+            plt.plot(historico)
+            plt.title('Evolução do Fitness')
+            plt.xlabel('Geração')
+            plt.ylabel('Fitness')
+            plt.savefig(args.grafico)
+            plt.close()
+
+        if args.simular:
+            print("\nSimulando o melhor indivíduo...")
+            _simular_individuo(melhor_individuo)
+
+    elif args.comando in ('simulate', 'simular'):
+        individuo = IndividuoPG.carregar(args.individuo)
+        _simular_individuo(individuo, args.semente, args.gravar, args.trajetoria,
+                           args.passos_por_quadro)
+
+    else:
+        individuo = IndividuoPG.carregar(args.individuo)
+        banco = BancoAmbientes(args.semente, args.ambientes, args.episodios, 'execucao')
+        banco.atualizar(0)
+        episodios = banco.episodios()
+        if args.motor == 'lote':
+            fitness = float(MotorLote(episodios).avaliar([individuo])[0])
+        else:
+            fitness = avaliar_em_episodios(individuo, episodios)
+        print(f"Fitness de {args.individuo}: {fitness:.2f} "
+              f"({len(episodios)} episódios, semente {args.semente})")
+    return 0
+
 
-    print("Executando simulação em tempo real...")
-    simulador.simular()
+# Executando o algoritmo
+if __name__ == "__main__":
+    sys.exit(main())